@@ -0,0 +1,317 @@
+"""Assignment 2 - Blocky
+
+=== CSC148 Fall 2017 ===
+Diane Horton and David Liu
+Department of Computer Science,
+University of Toronto
+
+
+=== Module Description ===
+
+This file measures how fast Blocky's hot paths are, and how much memory
+boards take.  For example,
+
+    python benchmark.py --output now.json --baseline before.json
+
+times each operation in OPERATIONS on boards of max_depth 3 to 7 made from
+fixed seeds, prints the operations per second, the median and 99th
+percentile time per operation and the peak memory of each, writes them to
+now.json, and reports every operation whose median time has grown since
+before.json, a file written by an earlier run.  The exit status is 1 if
+any has.
+
+    python benchmark.py --memory --depth 7
+
+prints the number of Blocks in a random board of max_depth 7, and the bytes
+each of them takes once the board has been laid out.
+"""
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from block import Block, random_init
+from colours import COLOUR_LIST
+from goal import BlobGoal, PerimeterGoal
+from player import SmartPlayer
+from renderer import NullRenderer
+
+# The size of the board, in pixels, when it is laid out.
+BOARD_SIZE = 750
+
+# The operations the suite times, in the order they are reported.
+OPERATIONS = ['random_init', 'update_block_locations', 'rotate', 'swap',
+              'smash', 'flatten', 'BlobGoal.score', 'PerimeterGoal.score',
+              'rectangles_to_draw', 'SmartPlayer.make_move']
+
+# The number of times each operation is timed per seed, if not given.
+# SmartPlayer moves are slow, so they are timed a tenth as often.
+DEFAULT_REPEAT = 200
+
+# The difficulty of the SmartPlayer whose moves are timed.
+SMART_DIFFICULTY = 2
+
+# The fraction by which an operation's median time may be longer than its
+# baseline's before it is reported, if not given.
+DEFAULT_TOLERANCE = 0.2
+
+
+def node_memory(max_depth: int, seed: int = 0) -> Tuple[int, float]:
+    """Return the number of Blocks in the random board of <max_depth> made
+    with random seed <seed>, and the average number of bytes allocated for
+    each, including its children list and geometry.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        random.seed(seed)
+        board = random_init(0, max_depth)
+        board.update_block_locations((0, 0), BOARD_SIZE)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    nodes = _count(board)
+    return nodes, (after - before) / nodes
+
+
+def _count(block: Block) -> int:
+    """A helper for node_memory.
+
+    Return the number of Blocks within <block>, including itself.
+    """
+    return 1 + sum(_count(child) for child in block.children)
+
+
+def measure(operation: str, max_depth: int, seeds: List[int],
+            repeat: int = DEFAULT_REPEAT) -> Dict:
+    """Return how fast <operation>, one of OPERATIONS, is on boards of
+    <max_depth> made from each of <seeds>, timing it <repeat> times on each.
+
+    The result records the operation, max_depth and number of samples, the
+    operations per second, the median and 99th percentile seconds per
+    operation, and the peak number of bytes allocated while it ran.  Peak
+    memory is measured in a separate, shorter run, since tracing
+    allocations slows everything down.
+    """
+    if operation == 'SmartPlayer.make_move':
+        repeat = max(1, repeat // 10)
+    times = []
+    for seed in seeds:
+        times.extend(_run(operation, max_depth, seed, repeat, False))
+    peak = max(_run(operation, max_depth, seed, min(repeat, 10), True)[0]
+               for seed in seeds)
+    return {
+        'operation': operation,
+        'max_depth': max_depth,
+        'samples': len(times),
+        'ops_per_second': len(times) / sum(times),
+        'p50_seconds': percentile(times, 0.5),
+        'p99_seconds': percentile(times, 0.99),
+        'peak_bytes': peak
+    }
+
+
+def _run(operation: str, max_depth: int, seed: int, repeat: int,
+         trace: bool) -> List[float]:
+    """A helper for measure.
+
+    Perform <operation> <repeat> times on the board of <max_depth> made from
+    <seed>, and return the seconds each took.  If <trace> is True, return
+    instead a one-element list of the peak number of bytes allocated by
+    the operations, beyond what was allocated before them.
+    """
+    random.seed(seed)
+    board = random_init(0, max_depth)
+    board.update_block_locations((0, 0), BOARD_SIZE)
+    rng = random.Random(seed)
+    player = SmartPlayer(NullRenderer(1), 0,
+                         BlobGoal(COLOUR_LIST[seed % len(COLOUR_LIST)]),
+                         SMART_DIFFICULTY)
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+    # As in timeit, collections are kept from landing in random samples.
+    gc.disable()
+    times = []
+    try:
+        for _ in range(repeat):
+            call = _prepare(operation, board, player, rng)
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+        if trace:
+            return [tracemalloc.get_traced_memory()[1] - before]
+    finally:
+        gc.enable()
+        if trace:
+            tracemalloc.stop()
+    return times
+
+
+def _prepare(operation: str, board: Block, player: SmartPlayer,
+             rng: random.Random) -> Callable[[], object]:
+    """A helper for _run.
+
+    Return a call that performs <operation> once on <board>, or with
+    <player>, choosing Blocks and moves with <rng>.  Operations that read
+    the board are preceded by an untimed random move, so that they must
+    recompute what it changed, as they do during a game.
+    """
+    if operation == 'random_init':
+        return lambda: random_init(0, board.max_depth)
+    if operation == 'update_block_locations':
+        return lambda: board.update_block_locations((0, 0), BOARD_SIZE)
+    if operation == 'SmartPlayer.make_move':
+        return lambda: player.make_move(board)
+
+    blocks = board.get_all_blocks()
+    if operation == 'smash':
+        blocks = [block for block in blocks
+                  if 0 < block.level < block.max_depth] or [board]
+    block = blocks[rng.randrange(len(blocks))]
+    direction = rng.randrange(2)
+    if operation == 'rotate':
+        return lambda: block.rotate(1 + 2 * direction)
+    if operation == 'swap':
+        return lambda: block.swap(direction)
+    if operation == 'smash':
+        return block.smash
+
+    if rng.randrange(2) == 0:
+        block.rotate(1 + 2 * direction)
+    else:
+        block.swap(direction)
+    if operation == 'flatten':
+        return board.flatten
+    if operation == 'BlobGoal.score':
+        return lambda: BlobGoal(COLOUR_LIST[0]).score(board)
+    if operation == 'PerimeterGoal.score':
+        return lambda: PerimeterGoal(COLOUR_LIST[0]).score(board)
+    if operation == 'rectangles_to_draw':
+        return board.rectangles_to_draw
+    raise ValueError(f'unknown operation {operation}')
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the smallest of <values> that is at least as large as
+    <fraction> of them.
+
+    >>> percentile([4, 1, 3, 2], 0.5)
+    2
+    >>> percentile(list(range(1, 101)), 0.99)
+    99
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def compare(results: List[Dict], baseline: List[Dict],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Return a description of each of <results> whose median time is longer,
+    by more than the fraction <tolerance>, than that of the result in
+    <baseline> with the same operation and max_depth.
+
+    Medians are compared, rather than operations per second, since a few
+    slow samples, from another process or a collection, can move the mean
+    a long way.
+
+    >>> before = [{'operation': 'rotate', 'max_depth': 5,
+    ...            'p50_seconds': 1e-06}]
+    >>> compare([{'operation': 'rotate', 'max_depth': 5,
+    ...           'p50_seconds': 1.1e-06}], before)
+    []
+    >>> compare([{'operation': 'rotate', 'max_depth': 5,
+    ...           'p50_seconds': 2e-06}], before)
+    ['rotate at depth 5: 2.0 us, was 1.0 us (+100%)']
+    """
+    old = {(result['operation'], result['max_depth']): result
+           for result in baseline}
+    slower = []
+    for result in results:
+        key = (result['operation'], result['max_depth'])
+        if key in old:
+            was = old[key]['p50_seconds']
+            now = result['p50_seconds']
+            if now > was * (1 + tolerance):
+                slower.append(f'{key[0]} at depth {key[1]}: '
+                              f'{now * 1e6:.1f} us, was {was * 1e6:.1f} us '
+                              f'({now / was - 1:+.0%})')
+    return slower
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """Run the benchmarks described by the command line <args>, or by
+    sys.argv if <args> is None, and return the exit status.
+    """
+    parser = argparse.ArgumentParser(
+        description='Time Blocky operations and measure board memory.')
+    parser.add_argument('--depth', type=int, nargs='*', default=None,
+                        help='max_depth of the boards (default: 3 to 7, or '
+                             '5 to 7 with --memory)')
+    parser.add_argument('--seeds', type=int, default=3,
+                        help='number of boards, from seeds 0 up, per depth')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='times each operation is timed per board')
+    parser.add_argument('--only', nargs='*', choices=OPERATIONS,
+                        default=OPERATIONS, help='operations to time')
+    parser.add_argument('--output', default=None,
+                        help='JSON file to write the results to')
+    parser.add_argument('--baseline', default=None,
+                        help='JSON file of earlier results to compare with')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='fraction by which a median may exceed the '
+                             'baseline')
+    parser.add_argument('--memory', action='store_true',
+                        help='print the bytes per Block instead')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed for the boards, with --memory')
+    options = parser.parse_args(args)
+
+    if options.memory:
+        print(f'{"depth":>5} {"blocks":>8} {"bytes/block":>12}')
+        for depth in options.depth or [5, 6, 7]:
+            nodes, per_node = node_memory(depth, options.seed)
+            print(f'{depth:>5} {nodes:>8} {per_node:>12.1f}')
+        return 0
+
+    seeds = list(range(options.seeds))
+    results = []
+    print(f'{"operation":<24} {"depth":>5} {"ops/s":>10} {"p50 us":>10} '
+          f'{"p99 us":>10} {"peak KiB":>9}')
+    for operation in options.only:
+        for depth in options.depth or [3, 4, 5, 6, 7]:
+            result = measure(operation, depth, seeds, options.repeat)
+            results.append(result)
+            print(f'{operation:<24} {depth:>5} '
+                  f'{result["ops_per_second"]:>10.0f} '
+                  f'{result["p50_seconds"] * 1e6:>10.1f} '
+                  f'{result["p99_seconds"] * 1e6:>10.1f} '
+                  f'{result["peak_bytes"] / 1024:>9.1f}')
+
+    if options.output is not None:
+        with open(options.output, 'w') as file:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'seeds': seeds,
+                       'repeat': options.repeat,
+                       'results': results}, file, indent=1)
+    if options.baseline is not None:
+        with open(options.baseline) as file:
+            slower = compare(results, json.load(file)['results'],
+                             options.tolerance)
+        for line in slower:
+            print(f'SLOWER: {line}')
+        if len(slower) > 0:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,15 +10,28 @@ University of Toronto
 
 This file contains the Block class, the main data structure used in the game.
 """
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List, Union
 import random
 import math
-from renderer import COLOUR_LIST, TEMPTING_TURQUOISE, BLACK, colour_name
+import numpy as np
+from colours import COLOUR_LIST, TEMPTING_TURQUOISE, BLACK, colour_name, \
+    colour_index
+from summary import BlobSummary, leaf_summary, merge_summaries, \
+    rotate_summary
 
 
 HIGHLIGHT_COLOUR = TEMPTING_TURQUOISE
 FRAME_COLOUR = BLACK
 
+# The mask of each of the three fields packed into Block._geometry.
+_FIELD = 0xFFFF
+
+# The lists returned by cell_table, by size and depth.
+_CELL_TABLES = {}
+
+# The chance that seeded_init subdivides a Block, by level, as in random_init.
+_SPLIT_ODDS = [math.exp(-0.25 * level) for level in range(32)]
+
 
 class Block:
     """A square block in the Blocky game.
@@ -62,15 +75,67 @@ class Block:
     - If this Block has no children,
         - its colour is not None
     - level <= max_depth
+    - colour is None or in COLOUR_LIST
     """
-    position: Tuple[int, int]
-    size: int
-    colour: Optional[Tuple[int, int, int]]
     level: int
     max_depth: int
     highlighted: bool
-    children: List['Block']
     parent: Optional['Block']
+    # === Private Attributes ===
+    # _colour:
+    #     The index of colour in COLOUR_LIST, or -1 if colour is None.
+    # _children:
+    #     The children of this Block, as they were before the last _turns
+    #     clockwise quarter turns.
+    # _turns:
+    #     The number of clockwise quarter turns, from 0 to 3, that this Block
+    #     has been rotated by but that have not yet been applied to its
+    #     children.  They are applied, one level at a time, when children is
+    #     next read, so every Block reached by walking down from the
+    #     outermost Block is up to date.  A Block held from before one of
+    #     its ancestors was rotated is brought up to date by _settle, which
+    #     the methods that change or locate a Block call first.
+    # _grid:
+    #     The array last returned by flatten_array, or None if this Block
+    #     or one of its descendants has been rotated, swapped or smashed
+    #     since.  If a Block's _grid is None, so is its parent's.
+    # _summary:
+    #     The BlobSummary last returned by blob_summary, or None; it is
+    #     discarded along with _grid.
+    # _keys:
+    #     The keys of this Block as it is and as it would be after one, two
+    #     and three clockwise rotations, or None if they are out of date.
+    #     They are discarded along with _grid.
+    # When a Block is rotated, its _grid, _summary and _keys are rotated
+    # along with it rather than discarded.
+    # _geometry:
+    #     The values of position and size as of the last layout, packed
+    #     into one int as x << 32 | y << 16 | size.
+    # _relayout:
+    #     True iff this Block's children have moved since the last layout,
+    #     so the geometry of its descendants is out of date.
+    # _relayout_below:
+    #     True iff _relayout is True for some descendant of this Block.
+    #     If either flag is True for a Block, this one is for its parent.
+    # _hits:
+    #     For the outermost Block, the Block returned by get_selected_block
+    #     for each (column, row, level) of a unit cell and level asked for
+    #     since the last layout, or None.  For any other Block, None.
+    _colour: int
+    _children: List['Block']
+    _turns: int
+    _grid: Optional[np.ndarray]
+    _summary: Optional[BlobSummary]
+    _keys: Optional[List[int]]
+    _geometry: int
+    _relayout: bool
+    _relayout_below: bool
+    _hits: Optional[Dict[Tuple[int, int, int], 'Block']]
+
+    # Blocks are the bulk of a game's memory, so they have no __dict__.
+    __slots__ = ('level', 'max_depth', 'highlighted', 'parent', '_colour',
+                 '_children', '_turns', '_grid', '_summary', '_keys',
+                 '_geometry', '_relayout', '_relayout_below', '_hits')
 
     def __init__(self, level: int,
                  colour: Optional[Tuple[int, int, int]] = None,
@@ -84,9 +149,15 @@ class Block:
         and max_depth) to 0.  (All attributes can be updated later, as
         appropriate.)
         """
-        self.position = (0, 0)
-        self.size = 0
-        self.colour = colour
+        self._geometry = 0
+        self._relayout = False
+        self._relayout_below = False
+        self._hits = None
+        self._grid = None
+        self._summary = None
+        self._keys = None
+        self._turns = 0
+        self._colour = -1 if colour is None else _index_of(colour)
         self.level = level
         self.max_depth = 0
         self.highlighted = False
@@ -94,6 +165,97 @@ class Block:
         if children is not None:
             self.children = children
         self.parent = None
+        for child in self.children:
+            child.parent = self
+
+    @property
+    def children(self) -> List['Block']:
+        """The blocks into which this block is subdivided.
+        """
+        if self._turns != 0:
+            self._apply_turns()
+        return self._children
+
+    @children.setter
+    def children(self, children: List['Block']) -> None:
+        """Set the blocks into which this block is subdivided.
+        """
+        self._children = children
+        self._turns = 0
+
+    def _apply_turns(self) -> None:
+        """A helper for children.
+
+        Apply this Block's pending quarter turns to its children, leaving
+        them pending on its children's own children.
+        """
+        turns = self._turns
+        self._turns = 0
+        old = self._children
+        self._children = [old[(i + turns) % 4] for i in range(4)]
+        for child in self._children:
+            child._turn(turns)
+
+    def _settle(self) -> None:
+        """Apply the pending quarter turns of this Block's ancestors, from the
+        outermost one down, so that this Block and its children are in their
+        true places.
+        """
+        ancestors = []
+        block = self.parent
+        while block is not None:
+            ancestors.append(block)
+            block = block.parent
+        for block in reversed(ancestors):
+            if block._turns != 0:
+                block._apply_turns()
+
+    def _turn(self, turns: int) -> None:
+        """Rotate this Block clockwise by <turns> quarter turns, in constant
+        time.
+
+        The turns are left pending on this Block's children, and its cached
+        grid, blob summary and keys are rotated with it.  Nothing else is
+        updated.
+        """
+        if len(self._children) == 4:
+            self._turns = (self._turns + turns) % 4
+        if self._grid is not None:
+            self._grid = _rotate_grid(self._grid, turns)
+        if self._summary is not None:
+            self._summary = rotate_summary(self._summary, turns)
+        if self._keys is not None:
+            self._keys = self._keys[turns:] + self._keys[:turns]
+
+    @property
+    def colour(self) -> Optional[Tuple[int, int, int]]:
+        """The colour of this Block, or None if it is subdivided.
+        """
+        if self._colour < 0:
+            return None
+        return COLOUR_LIST[self._colour]
+
+    @colour.setter
+    def colour(self, colour: Optional[Tuple[int, int, int]]) -> None:
+        """Set the colour of this Block to <colour>, which must be None or in
+        COLOUR_LIST.
+        """
+        self._colour = -1 if colour is None else _index_of(colour)
+        self._invalidate()
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        """The (x, y) coordinates of the upper left corner of this Block.
+        """
+        self._layout()
+        return self._geometry >> 32, (self._geometry >> 16) & _FIELD
+
+    @property
+    def size(self) -> int:
+        """The height and width of this Block.
+        """
+        self._layout()
+        return self._geometry & _FIELD
 
     def rectangles_to_draw(self) -> List[Tuple[Tuple[int, int, int],
                                                Tuple[int, int],
@@ -125,35 +287,37 @@ class Block:
 
         The order of the rectangles does not matter.
         """
-        # testing suggests this is correct
+        self._layout()
         lst = []
+        self._rectangles(lst)
+        return lst
+
+    def _rectangles(self, lst: List[Tuple[Tuple[int, int, int],
+                                          Tuple[int, int],
+                                          Tuple[int, int],
+                                          int]]) -> None:
+        """A helper for rectangles_to_draw.
+
+        Add the rectangles needed to render this Block to <lst>, assuming
+        its layout is up to date.
+        """
+        geometry = self._geometry
+        position = (geometry >> 32, (geometry >> 16) & _FIELD)
+        size = (geometry & _FIELD, geometry & _FIELD)
         if len(self.children) == 0:
+            lst.append((self.colour, position, size, 0))
+            lst.append((FRAME_COLOUR, position, size, 3))
             # a highlighted rectangle that does not have children
             if self.highlighted is True:
-                return [(self.colour, self.position, (self.size,
-                                                      self.size), 0),
-                        (FRAME_COLOUR, self.position, (self.size,
-                                                       self.size), 3),
-                        (HIGHLIGHT_COLOUR, self.position, (self.size,
-                                                           self.size), 5)]
-
-            # a regular rectangle
-            if self.highlighted is False:
-                return [(self.colour, self.position, (self.size,
-                                                      self.size), 0),
-                        (FRAME_COLOUR, self.position, (self.size,
-                                                       self.size), 3)]
+                lst.append((HIGHLIGHT_COLOUR, position, size, 5))
         else:
             # recursion
             for i in self.children:
-                lst.extend(i.rectangles_to_draw())
+                i._rectangles(lst)
             # a highlighted rectangle that does have children
             if self.highlighted is True:
-                lst.extend([(FRAME_COLOUR, self.position, (self.size,
-                                                           self.size), 3),
-                            (HIGHLIGHT_COLOUR, self.position, (self.size,
-                                                               self.size), 5)])
-            return lst
+                lst.append((FRAME_COLOUR, position, size, 3))
+                lst.append((HIGHLIGHT_COLOUR, position, size, 5))
 
     def swap(self, direction: int) -> None:
         """Swap the child Blocks of this Block.
@@ -161,6 +325,7 @@ class Block:
         If <direction> is 1, swap vertically.  If <direction> is 0, swap
         horizontally. If this Block has no children, do nothing.
         """
+        self._settle()
         if len(self.children) == 4:
             if direction == 0:
                 self.children[0], self.children[1] = self.children[1], \
@@ -172,42 +337,35 @@ class Block:
                                                      self.children[0]
                 self.children[1], self.children[2] = \
                     self.children[2], self.children[1]
-            self.update_block_locations(self.position, self.size)
+            self._changed()
 
     def rotate(self, direction: int) -> None:
         """Rotate this Block and all its descendants.
 
         If <direction> is 1, rotate clockwise.  If <direction> is 3, rotate
-        counterclockwise. If this Block has no children, do nothing.
+        counterclockwise. If this Block has no children, or <direction> is
+        anything else, do nothing.
+
+        This takes constant time, apart from discarding the caches of this
+        Block's ancestors: the rotation is only recorded, and is carried
+        down to each descendant when it is next reached.  Rotating back
+        cancels it without visiting the descendants at all.
+
+        >>> random.seed(5)
+        >>> b = random_init(0, 3)
+        >>> before = b.flatten_array().tolist()
+        >>> b.rotate(1)
+        >>> b.flatten_array().tolist() == np.rot90(before, 1).tolist()
+        True
+        >>> b.rotate(3)
+        >>> b.flatten_array().tolist() == before
+        True
         """
-        if len(self.children) == 4:
-            # CCW
-            if direction == 3:
-                # 1 - > 0
-                # 2 - > 1
-                # 3 -> 2
-                # 0 -> 3
-                # should go clockwise but it doesn't
-                for i in range(len(self.children)):
-                    self.children[i].rotate(direction)
-                self.children[0], self.children[1], self.children[2], \
-                    self.children[3] = self.children[3], self.children[0],  \
-                    self.children[1], self.children[2]
-
-            # CCW
-            elif direction == 1:
-                # 3 - > 0
-                # 0 - > 1
-                # 1 -> 2
-                # 2 -> 3
-                # should go counter clockwise but it doesn't
-                for i in range(len(self.children)):
-                    self.children[i].rotate(direction)
-                self.children[0], self.children[1], self.children[2], \
-                    self.children[3] = self.children[1], self.children[2], \
-                    self.children[3], self.children[0]
-
-            self.update_block_locations(self.position, self.size)
+        if len(self._children) == 4 and direction in (1, 3):
+            grid, summary, keys = self._grid, self._summary, self._keys
+            self._changed()
+            self._grid, self._summary, self._keys = grid, summary, keys
+            self._turn(direction)
 
     def smash(self) -> bool:
         """Smash this block.
@@ -223,16 +381,46 @@ class Block:
         Return True if this Block was smashed and False otherwise.
         """
 
+        self._settle()
         if self.level != 0 and self.level != self.max_depth:
             if len(self.children) == 4:
                 del self.children[:]
             for _ in range(4):
-                self.children.append(random_init(self.level + 1,
-                                                 self.max_depth))
-            self.update_block_locations(self.position, self.size)
+                child = random_init(self.level + 1, self.max_depth)
+                child.parent = self
+                self.children.append(child)
+            self._colour = -1
+            self._changed()
             return True
         return False
 
+    def graft(self, subtree: 'Block') -> None:
+        """Give this Block the children and colour of <subtree>, a Block at
+        the same level that is not part of any board, as if this Block had
+        been smashed and <subtree> is what it became.
+
+        This is how a recorded smash is replayed without repeating the
+        random choices that made it.
+
+        >>> random.seed(5)
+        >>> b = random_init(0, 3)
+        >>> target = b.children[0]
+        >>> target.smash()
+        True
+        >>> smashed = encode(target)
+        >>> random.seed(5)
+        >>> c = random_init(0, 3)
+        >>> c.children[0].graft(decode(smashed))
+        >>> c.key() == b.key()
+        True
+        """
+        self._settle()
+        self.children = subtree.children
+        for child in self.children:
+            child.parent = self
+        self._colour = subtree._colour
+        self._changed()
+
     def update_block_locations(self, top_left: Tuple[int, int],
                                size: int) -> None:
         """
@@ -244,31 +432,72 @@ class Block:
         <top_left> is the (x, y) coordinates of the top left corner of
         this Block.  <size> is the height and width of this Block.
         """
+        self._hits = None
+        self._place(top_left[0], top_left[1], size)
+
+    def _place(self, x: int, y: int, size: int) -> None:
+        """A helper for update_block_locations.
+
+        Lay out this Block with its top left corner at (<x>, <y>) and with
+        height and width <size>, without building a tuple per Block.
 
-        self.position = top_left
-        self.size = size
+        Precondition: 0 <= x, y, size < 2 ** 16
+        """
+        self._geometry = x << 32 | y << 16 | size
+        self._relayout = False
+        self._relayout_below = False
 
         if len(self.children) == 4:
-            self.children[0].update_block_locations((self.position[0] +
-                                                     round(size / 2.0),
-                                                     self.position[1]),
-                                                    round(size / 2.0))
-
-            self.children[1].update_block_locations(self.position,
-                                                    round(size / 2.0))
-
-            self.children[2].update_block_locations((self.position[0],
-                                                     self.position[1] +
-                                                     (round(size / 2.0))),
-                                                    round(size / 2.0))
-            self.children[3].update_block_locations((self.position[0] +
-                                                     round(size / 2.0),
-                                                     self.position[1] +
-                                                     (round(size / 2.0))),
-                                                    round(size / 2.0))
+            half = round(size / 2.0)
+            self.children[0]._place(x + half, y, half)
+            self.children[1]._place(x, y, half)
+            self.children[2]._place(x, y + half, half)
+            self.children[3]._place(x + half, y + half, half)
             for i in range(len(self.children)):
                 self.children[i].parent = self
 
+    def _changed(self) -> None:
+        """Record that the children of this Block have just been rotated,
+        swapped or replaced.
+
+        Cached grids and summaries are discarded up to the root, and the
+        geometry of this Block's descendants will be recomputed, in one
+        pass, the next time any position or size is read.
+        """
+        self._invalidate()
+        self._relayout = True
+        block = self.parent
+        while block is not None and not block._relayout_below:
+            block._relayout_below = True
+            block = block.parent
+
+    def _layout(self) -> None:
+        """Bring the position and size of every Block within the outermost
+        Block containing this one up to date.
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        if root._relayout or root._relayout_below:
+            root._hits = None
+            root._resolve_layout()
+
+    def _resolve_layout(self) -> None:
+        """A helper for _layout.
+
+        Lay out again every part of this Block that has moved, visiting only
+        the Blocks on the way to them.
+        """
+        if self._relayout:
+            geometry = self._geometry
+            self._place(geometry >> 32, (geometry >> 16) & _FIELD,
+                        geometry & _FIELD)
+        elif self._relayout_below:
+            self._relayout_below = False
+            for child in self.children:
+                if child._relayout or child._relayout_below:
+                    child._resolve_layout()
+
     def get_selected_block(self, location: Tuple[int, int], level: int) \
             -> 'Block':
         """Return the Block within this Block that includes the given location
@@ -286,21 +515,52 @@ class Block:
         Preconditions:
         - 0 <= level <= max_depth
         """
+        self._layout()
+        geometry = self._geometry
+        size = geometry & _FIELD
+        x = location[0] - (geometry >> 32)
+        y = location[1] - ((geometry >> 16) & _FIELD)
+        if not (0 <= x < size and 0 <= y < size):
+            return self if self.level == 0 else None
+        if self.level >= level:
+            return self
 
-        if self.position[0] <= location[0] <= self.position[0] + self.size and\
-           self.position[1] <= location[1] <= self.position[1] + self.size:
-            if self.level == level:
-                return self
-            elif len(self.children) == 4 and self.level < level:
-                for i in range(len(self.children)):
-                    result = self.children[i].get_selected_block(location,
-                                                                 level)
-                    if result is not None:
-                        return result
+        # Which unit cell the location is in depends only on the size of
+        # this Block, so it is looked up rather than found by trying each
+        # child in turn.
+        table = cell_table(size, self.max_depth - self.level)
+        column = table[x]
+        row = table[y]
+        if self.parent is not None:
+            return self._select(column, row, level)
+        if self._hits is None:
+            self._hits = {}
+        block = self._hits.get((column, row, level))
+        if block is None:
+            block = self._select(column, row, level)
+            self._hits[(column, row, level)] = block
+        return block
+
+    def _select(self, column: int, row: int, level: int) -> 'Block':
+        """A helper for get_selected_block.
+
+        Return the Block at the given level, or the undivided Block above
+        it, that contains the unit cell at <column> and <row> within this
+        Block.  The bits of the column and row say which child to enter at
+        each level, so only one Block per level is visited.
+        """
+        block = self
+        while block.level < level:
+            children = block.children
+            if len(children) == 0:
+                break
+            bit = block.max_depth - block.level - 1
+            right = (column >> bit) & 1
+            if (row >> bit) & 1:
+                block = children[3 if right else 2]
             else:
-                return self
-        elif self.level == 0:
-            return self
+                block = children[0 if right else 1]
+        return block
 
     def flatten(self) -> List[List[Tuple[int, int, int]]]:
         """Return a two-dimensional list representing this Block as rows
@@ -316,6 +576,9 @@ class Block:
 
         L[0][0] represents the unit cell in the upper left corner of the Block.
 
+        This is built from flatten_array, which should be preferred where
+        colour indices will do.
+
         # hint
         >>> [-1] * 12
         [-1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1]
@@ -338,43 +601,120 @@ class Block:
         [[(255, 211, 92), (255, 211, 92), (199, 44, 58), (255, 211, 92), (138, 151, 71), (138, 151, 71), (138, 151, 71), (138, 151, 71)], [(255, 211, 92), (255, 211, 92), (1, 128, 181), (199, 44, 58), (138, 151, 71), (138, 151, 71), (138, 151, 71), (138, 151, 71)], [(255, 211, 92), (138, 151, 71), (199, 44, 58), (199, 44, 58), (138, 151, 71), (138, 151, 71), (138, 151, 71), (138, 151, 71)], [(199, 44, 58), (199, 44, 58), (1, 128, 181), (199, 44, 58), (138, 151, 71), (138, 151, 71), (138, 151, 71), (138, 151, 71)], [(199, 44, 58), (199, 44, 58), (199, 44, 58), (199, 44, 58), (255, 211, 92), (199, 44, 58), (138, 151, 71), (1, 128, 181)], [(199, 44, 58), (199, 44, 58), (199, 44, 58), (199, 44, 58), (138, 151, 71), (199, 44, 58), (138, 151, 71), (138, 151, 71)], [(1, 128, 181), (1, 128, 181), (199, 44, 58), (255, 211, 92), (199, 44, 58), (199, 44, 58), (138, 151, 71), (255, 211, 92)], [(1, 128, 181), (1, 128, 181), (255, 211, 92), (1, 128, 181), (199, 44, 58), (255, 211, 92), (138, 151, 71), (138, 151, 71)]]
 
         """
+        return [[COLOUR_LIST[index] for index in column]
+                for column in self.flatten_array().tolist()]
 
-        if self.level == self.max_depth:
-            return [self.colour]
+    def flatten_array(self) -> np.ndarray:
+        """Return a two-dimensional array representing this Block as columns
+        and rows of unit cells.
 
-        elif len(self.children) == 0 and self.level < self.max_depth:
-            return self._arbitrary_size_block()
-        else:
-            list_ = []
+        The array A has shape (2^{max_depth - self.level},) * 2 and dtype
+        uint8, and is laid out like the list returned by flatten: A[i][j]
+        is the index into COLOUR_LIST of the colour of the unit cell at
+        column i and row j.
+
+        The array is cached on this Block until it is next rotated, swapped
+        or smashed, and is read-only so the cache cannot be corrupted.
 
-            list_.extend(self.children[1].flatten())
-            list_ = unit_cells(list_)
+        >>> random.seed(5)
+        >>> b1 = random_init(0, 1)
+        >>> b1.update_block_locations((0, 0), 750)
+        >>> b1.flatten_array().tolist()
+        [[0, 3], [2, 1]]
+        """
+        if self._grid is None:
+            side = 2 ** (self.max_depth - self.level)
+            if len(self.children) == 0:
+                grid = np.full((side, side), self._colour,
+                               dtype=np.uint8)
+            else:
+                half = side // 2
+                grid = np.empty((side, side), dtype=np.uint8)
+                grid[half:, :half] = self.children[0].flatten_array()
+                grid[:half, :half] = self.children[1].flatten_array()
+                grid[:half, half:] = self.children[2].flatten_array()
+                grid[half:, half:] = self.children[3].flatten_array()
+            grid.flags.writeable = False
+            self._grid = grid
+        return self._grid
+
+    def blob_summary(self) -> BlobSummary:
+        """Return a summary of the blobs within this Block.
+
+        The summary is built by merging the summaries of this Block's
+        children, so an undivided Block costs the same however many unit
+        cells it covers.  Like flatten_array, it is cached on this Block
+        until it is next rotated, swapped or smashed.
+        """
+        if self._summary is None:
+            if len(self.children) == 0:
+                self._summary = leaf_summary(
+                    self._colour,
+                    2 ** (self.max_depth - self.level))
+            else:
+                self._summary = merge_summaries(
+                    [child.blob_summary() for child in self.children])
+        return self._summary
 
-            list_.extend(self.children[2].flatten())
-            list_ = unit_cells(list_)
+    def key(self) -> int:
+        """Return a 64-bit key identifying the structure and colours of this
+        Block.
 
-            list_.extend(self.children[0].flatten())
-            list_ = unit_cells(list_)
+        Blocks with the same structure and colours at the same level have
+        the same key, in every run of the program.  Keys are cached: after
+        a rotate, swap or smash, only the keys on the path from the moved
+        Block to the root are recomputed.
 
-            list_.extend(self.children[3].flatten())
-            list_ = unit_cells(list_)
+        >>> random.seed(5)
+        >>> b = random_init(0, 3)
+        >>> before = b.key()
+        >>> b.children[0].rotate(1)
+        >>> b.key() == before
+        False
+        >>> b.children[0].rotate(3)
+        >>> b.key() == before
+        True
+        >>> decode(encode(b)).key() == before
+        True
+        """
+        return self._rotation_keys()[0]
 
-            if len(list_) == (2**(self.max_depth - self.level) * 4) // 2:
-                # Organize these blocks.
-                list_ = organize_block(list_)
-            return list_
+    def _rotation_keys(self) -> List[int]:
+        """A helper for key.
 
-    def _arbitrary_size_block(self) -> List[List[Tuple[int, int, int]]]:
-        """Organize a block without children into columns and rows, this is for
-        the basecase where this block has no unit cells.
+        Return the keys of this Block as it is and as it would be after one,
+        two and three clockwise rotations.
         """
-        new = []
-        threshold = math.floor((4**(self.max_depth - self.level))**0.5)
-        for i in range(threshold):
-            new.append([])
-        for i in new:
-            i.extend([self.colour] * threshold)
-        return new
+        if self._keys is None:
+            if len(self.children) == 0:
+                key = mix64(self.level * 8 + self._colour)
+                self._keys = [key, key, key, key]
+            else:
+                children = [child._rotation_keys() for child in self.children]
+                self._keys = []
+                for turns in range(4):
+                    key = mix64(self.level * 8 + SPLIT)
+                    for i in range(4):
+                        key = mix64(key ^ children[(i + turns) % 4][turns])
+                    self._keys.append(key)
+        return self._keys
+
+    def _invalidate(self) -> None:
+        """Discard the cached flattened grid, blob summary and keys of this
+        Block and of each of its ancestors.
+
+        Call this whenever the colours covered by this Block change.
+        Siblings keep their caches, so the next flatten_array or
+        blob_summary of the root only rebuilds the path down to this Block.
+        """
+        block = self
+        while block is not None and \
+                (block._grid is not None or block._summary is not None or
+                 block._keys is not None):
+            block._grid = None
+            block._summary = None
+            block._keys = None
+            block = block.parent
 
     def get_all_blocks(self) -> List['Block']:
         """A helper function that returns a list of all the block objects in
@@ -387,47 +727,111 @@ class Block:
                 list_ += child.get_all_blocks()
         return list_
 
+    def cell_origin(self) -> Tuple[int, int]:
+        """Return the column and row of the upper left unit cell of this
+        Block within the flattened grid of the outermost Block containing it.
 
-def unit_cells(lst: List[Tuple[int, int, int]]) -> List[List[Tuple[int, int,
-                                                                   int]]]:
-    """A helper function for flatten.
-
-    Organize a block of unit cells into columns and rows, this is for
-    the basecase where you've traveresed to max depth.
+        >>> random.seed(5)
+        >>> b = random_init(0, 1)
+        >>> [child.cell_origin() for child in b.children]
+        [(1, 0), (0, 0), (0, 1), (1, 1)]
+        """
+        self._settle()
+        x, y = 0, 0
+        block = self
+        while block.parent is not None:
+            side = 2 ** (block.max_depth - block.level)
+            index = block.parent.children.index(block)
+            if index == 0 or index == 3:
+                x += side
+            if index == 2 or index == 3:
+                y += side
+            block = block.parent
+        return x, y
+
+
+def block_path(block: Block) -> int:
+    """Return the path to <block> from the outermost Block containing it: 1
+    for the outermost Block, and 4 * p + i for child i of the Block whose
+    path is p, as for seeded_init.
+
+    >>> random.seed(5)
+    >>> b = random_init(0, 2)
+    >>> [block_path(child) for child in b.children]
+    [4, 5, 6, 7]
+    >>> block_at(b, 6) is b.children[2]
+    True
     """
-
-    flag = False
-    if len(lst) == 4:
-        for x in lst:
-            if isinstance(x, list):
-                flag = True
-        if flag is False:
-            lst = [[lst[0], lst[1]], [lst[2], lst[3]]]
-    return lst
+    column, row = block.cell_origin()
+    path = 1
+    for level in range(1, block.level + 1):
+        bit = block.max_depth - level
+        right = (column >> bit) & 1
+        if (row >> bit) & 1:
+            path = 4 * path + (3 if right else 2)
+        else:
+            path = 4 * path + (0 if right else 1)
+    return path
 
 
-def organize_block(lst: List[List[Tuple[int, int, int]]]) -> \
-        List[List[Tuple[int, int, int]]]:
-    """A helper function for flatten.
+def block_at(board: Block, path: int) -> Block:
+    """Return the Block within the outermost Block <board> whose path, as
+    returned by block_path, is <path>.
 
-    Rearrange the four children blocks of this block into columns and
-    rows.
+    Precondition: that Block exists.
     """
+    block = board
+    for shift in range(path.bit_length() - 3, -1, -2):
+        block = block.children[(path >> shift) & 3]
+    return block
+
 
-    flag = False
-    for i in lst:
-        if isinstance(i, tuple):
-            flag = True
-    if flag is False:
-        i = 0
-        new = []
-        while i + math.floor(len(lst) ** 0.5) < len(lst):
-            new.append(lst[i] + lst[i + math.floor(len(lst) ** 0.5)])
-            if len(new) == math.floor(len(lst) ** 0.5):
-                i += math.floor(len(lst) ** 0.5)
-            i += 1
-        return new
-    return lst
+def _rotate_grid(grid: np.ndarray, turns: int) -> np.ndarray:
+    """A helper for Block._turn.
+
+    Return a view of <grid> rotated clockwise by <turns> quarter turns, as
+    np.rot90 would, but without its overhead, which adds up when turns are
+    pushed down through every Block of a subtree.
+    """
+    if turns == 1:
+        return grid[:, ::-1].T
+    if turns == 2:
+        return grid[::-1, ::-1]
+    if turns == 3:
+        return grid.T[:, ::-1]
+    return grid
+
+
+def cell_table(size: int, depth: int) -> List[int]:
+    """Return the column of the unit cell under each pixel, from left to
+    right, of a Block of height and width <size> that is <depth> levels
+    above the unit cells, as laid out by update_block_locations.  The same
+    list gives the row under each pixel from top to bottom.
+
+    Each pixel belongs to exactly one unit cell, even where rounding makes
+    the children of a Block overlap or fall short of its edge.
+
+    >>> cell_table(6, 1)
+    [0, 0, 0, 1, 1, 1]
+    >>> cell_table(5, 2)
+    [0, 1, 2, 3, 3]
+    """
+    table = _CELL_TABLES.get((size, depth))
+    if table is None:
+        table = []
+        for offset in range(size):
+            cell = 0
+            side = size
+            for _ in range(depth):
+                half = round(side / 2.0)
+                cell <<= 1
+                if offset >= half:
+                    offset -= half
+                    cell |= 1
+                side = half
+            table.append(cell)
+        _CELL_TABLES[(size, depth)] = table
+    return table
 
 
 def random_init(level: int, max_depth: int) -> 'Block':
@@ -467,6 +871,184 @@ def _colour_helper(level: int, max_depth: int) -> 'Block':
     return block
 
 
+def seeded_init(seed: int, max_depth: int,
+                top_left: Tuple[int, int] = (0, 0), size: int = 750,
+                path: int = 1) -> 'Block':
+    """Return a randomly-generated Block subdivided to a maximum depth of
+    <max_depth>, with every attribute set, including the position and size
+    of each Block, laid out from <top_left> and <size>.
+
+    Blocks are subdivided and coloured with the same odds as random_init,
+    but the global random module is not used.  Each Block draws from its
+    own stream, a hash of <seed> and its path from the outermost Block, so
+    the same seed always gives the same board, and any subtree can be made
+    on its own, in any order or process, and match it bit for bit.
+
+    <path> is the path to the Block to make: 1 for the outermost Block, and
+    4 * p + i for child i of the Block whose path is p.
+
+    >>> b = seeded_init(7, 3)
+    >>> b.key() == seeded_init(7, 3).key()
+    True
+    >>> child = b.children[2]
+    >>> alone = seeded_init(7, 3, child.position, child.size, 4 * 1 + 2)
+    >>> alone.key() == child.key() and alone.level == child.level
+    True
+
+    Precondition:
+        max_depth <= 30
+    """
+    level = (path.bit_length() - 1) // 2
+    return _seeded_helper(mix64(seed & _KEY_MASK), path, level, max_depth,
+                          top_left[0], top_left[1], size)
+
+
+def _seeded_helper(stream: int, path: int, level: int, max_depth: int,
+                   x: int, y: int, size: int) -> 'Block':
+    """A helper for seeded_init.
+
+    Return the Block at <path> of the board whose streams are derived from
+    <stream>, at level <level> and laid out at (<x>, <y>) with height and
+    width <size>.
+    """
+    value = mix64(stream ^ path)
+    # The top 53 bits decide whether to subdivide, as random.random() would
+    # from the same bits, and the bottom two bits pick the colour.
+    if level < max_depth and \
+            (value >> 11) < _SPLIT_ODDS[level] * 2 ** 53:
+        half = round(size / 2.0)
+        path *= 4
+        children = [
+            _seeded_helper(stream, path, level + 1, max_depth, x + half, y,
+                           half),
+            _seeded_helper(stream, path + 1, level + 1, max_depth, x, y,
+                           half),
+            _seeded_helper(stream, path + 2, level + 1, max_depth, x,
+                           y + half, half),
+            _seeded_helper(stream, path + 3, level + 1, max_depth, x + half,
+                           y + half, half)
+        ]
+        block = Block(level, None, children)
+    else:
+        block = Block(level)
+        block._colour = value & 3
+    block.max_depth = max_depth
+    block._geometry = x << 32 | y << 16 | size
+    return block
+
+
+def _index_of(colour: Tuple[int, int, int]) -> int:
+    """Return the index of <colour> in COLOUR_LIST.
+
+    Raise a ValueError if <colour> is not in COLOUR_LIST.
+    """
+    index = colour_index(colour)
+    if index < 0:
+        raise ValueError(f'{colour} is not in COLOUR_LIST')
+    return index
+
+
+# The colour index that stands for a subdivided Block in keys.
+SPLIT = len(COLOUR_LIST)
+
+# The bits encode writes for an undivided Block of each colour index, and
+# the colour index decode reads back from the last two of them.
+_LEAF_BITS = ['000', '001', '010', '011']
+_LEAF_COLOURS = {'00': 0, '01': 1, '10': 2, '11': 3}
+
+# The eight bits of each byte value, most significant first.
+_BYTE_BITS = [format(byte, '08b') for byte in range(256)]
+
+# Keys are kept to 64 bits.
+_KEY_MASK = 2 ** 64 - 1
+
+
+def mix64(value: int) -> int:
+    """Return a well-mixed 64-bit hash of the non-negative int <value>,
+    using the SplitMix64 finaliser.
+    """
+    value = (value + 0x9E3779B97F4A7C15) & _KEY_MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _KEY_MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _KEY_MASK
+    return value ^ (value >> 31)
+
+
+def encode(block: Block) -> bytes:
+    """Return a compact copy of the structure and colours of <block>.
+
+    The first two bytes are the max_depth and level of <block>.  The rest
+    is a bitstream, in preorder, most significant bit first: 1 for a
+    subdivided Block, or else 0 followed by two bits for the index of its
+    colour in COLOUR_LIST.  Positions, sizes and parents are left out,
+    since they can be derived.
+
+    >>> random.seed(5)
+    >>> data = encode(random_init(0, 1))
+    >>> list(data[:2]), format(int.from_bytes(data[2:], 'big'), '016b')
+    ([1, 0], '1010000011001000')
+    """
+    bits = []
+    _encode_helper(block, bits)
+    stream = ''.join(bits)
+    stream += '0' * (-len(stream) % 8)
+    return bytes([block.max_depth, block.level]) + \
+        int(stream, 2).to_bytes(len(stream) // 8, 'big')
+
+
+def _encode_helper(block: Block, bits: List[str]) -> None:
+    """A helper for encode.
+
+    Append the bits of <block> and its descendants to <bits>, three at a
+    time for each undivided Block.
+    """
+    children = block.children
+    if len(children) == 0:
+        bits.append(_LEAF_BITS[colour_index(block.colour)])
+    else:
+        bits.append('1')
+        for child in children:
+            _encode_helper(child, bits)
+
+
+def decode(data: Union[bytes, memoryview]) -> 'Block':
+    """Return the Block whose encoding is <data>, with every attribute except
+    position and size set.
+
+    <data> may be a memoryview, for example of shared memory, in which case
+    it is read in place.
+
+    >>> random.seed(5)
+    >>> b = random_init(0, 2)
+    >>> decode(encode(b)).flatten() == b.flatten()
+    True
+    """
+    bits = ''.join([_BYTE_BITS[byte] for byte in data[2:]])
+    block, _ = _decode_helper(bits, 0, data[1], data[0])
+    return block
+
+
+def _decode_helper(bits: str, start: int, level: int,
+                   max_depth: int) -> Tuple['Block', int]:
+    """A helper for decode.
+
+    Return the Block whose bits begin at index <start> of <bits>, and the
+    index just past the end of its bits.
+    """
+    if bits[start] == '1':
+        children = []
+        start += 1
+        for _ in range(4):
+            child, start = _decode_helper(bits, start, level + 1, max_depth)
+            children.append(child)
+        block = Block(level, None, children)
+    else:
+        block = Block(level)
+        block._colour = _LEAF_COLOURS[bits[start + 1:start + 3]]
+        start += 3
+    block.max_depth = max_depth
+    return block, start
+
+
 def attributes_str(b: Block, verbose) -> str:
     """Return a str that is a concise representation of the attributes of <b>.
 
@@ -518,7 +1100,8 @@ if __name__ == '__main__':
         'allowed-io': ['print_block_indented'],
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing',
-            'block', 'goal', 'player', 'renderer', 'math'
+            'block', 'goal', 'player', 'renderer', 'colours', 'math', 'numpy',
+            'summary'
         ],
         'max-attributes': 15
     })
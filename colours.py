@@ -0,0 +1,63 @@
+"""Assignment 2 - Blocky
+
+=== CSC148 Fall 2017 ===
+Diane Horton and David Liu
+Department of Computer Science,
+University of Toronto
+
+
+=== Module Description ===
+
+This file contains the colours used by the game and helpers for naming and
+indexing them.  It does not depend on pygame, so the board, goals and
+computer players can be used without a display.
+"""
+from typing import Tuple
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+PACIFIC_POINT = (1, 128, 181)
+OLD_OLIVE = (138, 151, 71)
+REAL_RED = (199, 44, 58)
+MELON_MAMBO = (234, 62, 112)
+DAFFODIL_DELIGHT = (255, 211, 92)
+TEMPTING_TURQUOISE = (75, 196, 213)
+COLOUR_LIST = [PACIFIC_POINT, REAL_RED, OLD_OLIVE, DAFFODIL_DELIGHT]
+COLOUR_NAMES = ['Pacific Point', 'Real Red', 'Old Olive', 'Daffodil Delight']
+
+
+def colour_name(colour: Tuple[int, int, int]) -> str:
+    """Return the colour name associated with this colour value, or
+    the empty string if this colour value isn't in our colour list.
+
+    >>> colour_name(REAL_RED)
+    'Real Red'
+    """
+    for i in range(len(COLOUR_LIST)):
+        if COLOUR_LIST[i] == colour:
+            return COLOUR_NAMES[i]
+    return ''
+
+
+def colour_index(colour: Tuple[int, int, int]) -> int:
+    """Return the index of this colour value in our colour list, or -1
+    if this colour value isn't in our colour list.
+
+    >>> colour_index(OLD_OLIVE)
+    2
+    >>> colour_index(WHITE)
+    -1
+    """
+    for i in range(len(COLOUR_LIST)):
+        if COLOUR_LIST[i] == colour:
+            return i
+    return -1
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing'
+        ]
+    })
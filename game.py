@@ -14,12 +14,21 @@ Blocky game.
 At the bottom of the file, there are some function that you
 can call to try playing the game in several different configurations.
 """
+import base64
+import json
+import os
 import random
-from typing import List
-from block import Block, random_init
-from goal import BlobGoal, PerimeterGoal
-from player import Player, HumanPlayer, RandomPlayer, SmartPlayer
-from renderer import Renderer, COLOUR_LIST, colour_name, BOARD_WIDTH
+import time
+from typing import Dict, List, Optional
+from block import Block, random_init, seeded_init, encode, decode
+from linear import LinearBlock, linearize
+from goal import BlobGoal, PerimeterGoal, score_goals
+from metrics import Metrics
+from player import Player, HumanPlayer, RandomPlayer, SmartPlayer, \
+    SearchPlayer
+from renderer import Renderer, NullRenderer, COLOUR_LIST, colour_name, \
+    BOARD_WIDTH
+from replay import Move, record_move, moves_to_json, moves_from_json
 
 
 class Game:
@@ -27,40 +36,101 @@ class Game:
 
     === Public Attributes ===
     board:
-        The Blocky board on which this game will be played.
+        The Blocky board on which this game will be played.  It is either a
+        Block or, with the linear backend, a LinearBlock.
     renderer:
         The object that is capable of drawing our Blocky board on the screen,
         and tracking user interactions with the Blocky board.
     players:
         The entities that are playing this game.
+    move_times:
+        The number of seconds each move of the last call to run_game took,
+        in the order the moves were made.
+    turn:
+        The number of moves made so far.  The next move is made by
+        players[turn % len(players)].
+    initial_board:
+        The encoding of the board before any move was made, as by
+        block.encode.
+    moves:
+        The record of every move made so far, in order, which a
+        replay.Replay can apply to initial_board.
 
     === Representation Invariants ===
     - len(players) >= 1
+    - turn == len(moves)
     """
     board: Block
     renderer: Renderer
     players: List[Player]
+    move_times: List[float]
+    turn: int
+    initial_board: bytes
+    moves: List[Move]
 
     def __init__(self, max_depth: int,
                  num_human: int,
                  random_players: int,
-                 smart_players: List[int]) -> None:
+                 smart_players: List[int],
+                 workers: int = 0,
+                 search_players: Optional[List[int]] = None,
+                 headless: bool = False,
+                 backend: str = 'tree',
+                 board_seed: Optional[int] = None) -> None:
         """Initialize this game, as described in the Assignment 2 handout.
 
+        Each SmartPlayer scores its candidate moves with <workers> worker
+        processes, or in this process if <workers> is 0.  A SearchPlayer is
+        added after the SmartPlayers for each search depth in
+        <search_players>.
+
+        If <headless> is True, the game is played without a display: nothing
+        is drawn, computer players do not pause between moves, and pygame
+        is not needed.
+
+        <backend> is 'tree' to store the board as a tree of Blocks, or
+        'linear' to store it as a LinearBoard.  Either way, the same random
+        seed gives the same game.
+
+        If <board_seed> is not None, the board is made from it by
+        block.seeded_init, without drawing from the random module, so that
+        any Block of it can be made again from <board_seed> and its path
+        alone.  Otherwise it is made by random_init.
+
         Precondition:
             2 <= max_depth <= 5
+            num_human == 0 if headless
+            backend in ('tree', 'linear')
         """
+        self.move_times = []
+        self.turn = 0
+        self.moves = []
+
         # Create the board
-        self.board = random_init(0, max_depth)
-        self.board.update_block_locations((0, 0), BOARD_WIDTH)
+        if board_seed is None:
+            self.board = random_init(0, max_depth)
+            self.board.update_block_locations((0, 0), BOARD_WIDTH)
+        else:
+            self.board = seeded_init(board_seed, max_depth, (0, 0),
+                                     BOARD_WIDTH)
+        self.initial_board = encode(self.board)
+        if backend == 'linear':
+            self.board = linearize(self.board)
         # Generate a goal
         goals = [BlobGoal, PerimeterGoal]
         index = random.randrange(0, 2)
         goal = goals[index]
 
+        if search_players is None:
+            search_players = []
+
         # Create render
-        num_players = num_human + random_players + len(smart_players)
-        self.renderer = Renderer(num_players)
+        num_players = num_human + random_players + len(smart_players) + \
+            len(search_players)
+        if headless:
+            self.renderer = NullRenderer(num_players)
+        else:
+            self.renderer = Renderer(num_players)
 
         # Create players
         self.players = []
@@ -87,61 +157,276 @@ class Game:
                 colour = COLOUR_LIST[index]
                 self.players.append(SmartPlayer(self.renderer, val,
                                                 goal(colour),
-                                                smart_players[id_]))
+                                                smart_players[id_],
+                                                workers))
                 val += 1
+
+        # A SearchPlayer has a search depth, and needs to know the goals of
+        # the players it will be searching against.
+        for depth in search_players:
+            index = random.randrange(0, 4)
+            colour = COLOUR_LIST[index]
+            self.players.append(SearchPlayer(self.renderer, val,
+                                             goal(colour), depth))
+            val += 1
+        _set_opponents(self.players)
+
         # Display the goal and draw the board
         for i in self.players:
             self.renderer.display_goal(i)
             self.renderer.draw(self.board, i.id)
 
-    def run_game(self, num_turns: int) -> None:
-        """Run the game for the number of turns specified.
+    def run_game(self, num_turns: int, verbose: bool = True,
+                 checkpoint: Optional[str] = None,
+                 metrics: Optional[Metrics] = None) -> List[int]:
+        """Run the game for the number of turns specified, and return the
+        final score of each player, in the same order as self.players.
 
-        Each player gets <num_turns> turns. The first player in self.players
-        goes first.  Before each move, print to the console whose turn it is
-        and what the turn number is.  After each move, print the current score
-        of the player who just moved.
+        Each player gets <num_turns> turns, counting any made before this
+        game was resumed.  The first player in self.players goes first.
+        Before each move, print to the console whose turn it is and what the
+        turn number is.  After each move, print the current score of the
+        player who just moved.
 
         Report player numbers and turn numbers using 1-based counting.
         For example, refer to the self.players[0] as 'Player 1'.
 
         When the game is over, print who won to the console.
 
+        If <verbose> is False, nothing is printed.  If <checkpoint> is not
+        None, the game's checkpoint is written to the file of that name, as
+        JSON, after every move, so the game can be resumed from its last
+        move with load_game.
+
+        If <metrics> is not None, the time each move takes, split into
+        phases, and the work the players do are recorded in it.
+
+        The players' worker processes are shut down when this returns; they
+        are started again if the game is run further.
         """
-        # Index within self.players of the current player.
-        index = 0
-        for turn in range(num_turns * len(self.players)):
-            player = self.players[index]
-            print(f'Player {player.id}, turn {turn}')
-            if self.players[index].make_move(self.board) == 1:
-                break
-            else:
-                print(f'Player {player.id} CURRENT SCORE: ' +
-                      f'{player.goal.score(self.board)}')
-                index = (index + 1) % len(self.players)
+        self.move_times = []
+        for player in self.players:
+            player.metrics = metrics
+        # Worker processes are shut down however the game ends.
+        try:
+            while self.turn < num_turns * len(self.players):
+                # Index within self.players of the current player.
+                index = self.turn % len(self.players)
+                player = self.players[index]
+                if verbose:
+                    print(f'Player {player.id}, turn {self.turn}')
+                if metrics is not None:
+                    metrics.start_turn()
+                start = time.perf_counter()
+                if self.players[index].make_move(self.board) == 1:
+                    break
+                else:
+                    self.move_times.append(time.perf_counter() - start)
+                    if metrics is not None:
+                        metrics.end_turn(index, self.move_times[-1])
+                    self.moves.append(record_move(index, player.last_move))
+                    self.turn += 1
+                    if checkpoint is not None:
+                        save_checkpoint(self.checkpoint(), checkpoint)
+                    if verbose:
+                        print(f'Player {player.id} CURRENT SCORE: ' +
+                              f'{player.goal.score(self.board)}')
+                    if verbose and isinstance(player, SearchPlayer):
+                        print(f'Player {player.id} searched ' +
+                              f'{player.nodes_searched} positions, ' +
+                              f'{player.nodes_per_second:.0f} per second')
+        finally:
+            self.close()
+
+        scores = score_goals([player.goal for player in self.players],
+                             self.board)
+        if not verbose:
+            return scores
 
         # Determine and report the winner.
-        max_score = 0
-        winning_player = 0
+        winning_player = winner(scores)
         for i in range(len(self.players)):
-            score = self.players[i].goal.score(self.board)
-            print(f'Player {i} : {score}')
-            if score > max_score:
-                max_score = score
-                winning_player = i
+            print(f'Player {i} : {scores[i]}')
         print(f'WINNER is Player {winning_player}!')
         print('Players had these goals:')
         for player in self.players:
             print(f'Player {player.id} ' +
                   f'goal = \n\t{player.goal.description()}: ' +
                   f'{colour_name(player.goal.colour)}')
+        return scores
+
+    def close(self) -> None:
+        """Shut down the worker processes of every player in this game.
+        """
+        for player in self.players:
+            player.close()
+
+    def checkpoint(self) -> Dict:
+        """Return the state of this game between moves, as a dict that can
+        be written as JSON and passed to resume_game.
+
+        The board is kept encoded, as by block.encode.  Along with it are the
+        turn, each player's kind, goal and settings, the record of the moves
+        so far, and the state of the random module.  No player carries
+        anything else from one move to the next that changes how it plays,
+        so a resumed game plays on exactly as this one would have.
+        """
+        return {
+            'version': CHECKPOINT_VERSION,
+            'board': base64.b64encode(encode(self.board)).decode('ascii'),
+            'backend': 'linear' if isinstance(self.board, LinearBlock)
+                       else 'tree',
+            'turn': self.turn,
+            'initial_board': base64.b64encode(self.initial_board).decode(
+                'ascii'),
+            'moves': moves_to_json(self.moves),
+            'players': [_player_state(player) for player in self.players],
+            'random': random.getstate()
+        }
+
+
+# The version of the dicts returned by Game.checkpoint.
+CHECKPOINT_VERSION = 3
+
+# The goal classes, by name, for resume_game.
+GOALS = {'BlobGoal': BlobGoal, 'PerimeterGoal': PerimeterGoal}
+
+
+def _set_opponents(players: List[Player]) -> None:
+    """A helper for Game.__init__ and resume_game.
+
+    Give each SearchPlayer in <players> the goals of the others, in the
+    order they move after it.
+    """
+    for i in range(len(players)):
+        if isinstance(players[i], SearchPlayer):
+            players[i].opponents = [
+                player.goal for player in players[i + 1:] + players[:i]]
+
+
+def _player_state(player: Player) -> Dict:
+    """A helper for Game.checkpoint.
+
+    Return the kind, goal and settings of <player>.
+    """
+    state = {
+        'kind': type(player).__name__,
+        'goal': type(player.goal).__name__,
+        'colour': COLOUR_LIST.index(player.goal.colour)
+    }
+    if isinstance(player, HumanPlayer):
+        state['smashes'] = player.num_smashes
+    elif isinstance(player, SmartPlayer):
+        state['difficulty'] = player.diff
+    elif isinstance(player, SearchPlayer):
+        state['depth'] = player.depth
+        state['breadth'] = player.breadth
+        state['node_budget'] = player.node_budget
+        state['table_size'] = player.table_size
+    return state
+
+
+def resume_game(state: Dict, workers: int = 0,
+                headless: bool = False) -> Game:
+    """Return the Game whose checkpoint is <state>, ready for run_game to
+    carry on from its next move.
+
+    The random module is put back in the state it was in, and <workers> and
+    <headless> are as for Game.
+
+    Precondition:
+        state['version'] == CHECKPOINT_VERSION
+        not headless or no player in <state> is a HumanPlayer
+    """
+    game = Game.__new__(Game)
+    game.move_times = []
+    game.turn = state['turn']
+    game.initial_board = base64.b64decode(state['initial_board'])
+    game.moves = moves_from_json(state['moves'])
+    game.board = decode(base64.b64decode(state['board']))
+    game.board.update_block_locations((0, 0), BOARD_WIDTH)
+    if state['backend'] == 'linear':
+        game.board = linearize(game.board)
+    if headless:
+        game.renderer = NullRenderer(len(state['players']))
+    else:
+        game.renderer = Renderer(len(state['players']))
+
+    game.players = []
+    for id_ in range(len(state['players'])):
+        player = state['players'][id_]
+        goal = GOALS[player['goal']](COLOUR_LIST[player['colour']])
+        if player['kind'] == 'HumanPlayer':
+            game.players.append(HumanPlayer(game.renderer, id_, goal))
+            game.players[-1].num_smashes = player['smashes']
+        elif player['kind'] == 'RandomPlayer':
+            game.players.append(RandomPlayer(game.renderer, id_, goal))
+        elif player['kind'] == 'SmartPlayer':
+            game.players.append(SmartPlayer(game.renderer, id_, goal,
+                                            player['difficulty'], workers))
+        else:
+            game.players.append(SearchPlayer(game.renderer, id_, goal,
+                                             player['depth'],
+                                             player['breadth'],
+                                             player['node_budget'],
+                                             player['table_size']))
+    _set_opponents(game.players)
+
+    version, internal, gauss = state['random']
+    random.setstate((version, tuple(internal), gauss))
+    for player in game.players:
+        game.renderer.display_goal(player)
+        game.renderer.draw(game.board, player.id)
+    return game
 
 
-def auto_game() -> None:
+def save_checkpoint(state: Dict, path: str) -> None:
+    """Write the checkpoint <state> to the file at <path> as JSON.
+
+    The file is replaced in one step, so a game stopped while saving still
+    leaves its previous checkpoint behind.
+    """
+    with open(path + '.tmp', 'w') as file:
+        json.dump(state, file)
+    os.replace(path + '.tmp', path)
+
+
+def load_game(path: str, workers: int = 0, headless: bool = False) -> Game:
+    """Return the Game whose checkpoint was saved to the file at <path>,
+    with <workers> and <headless> as for resume_game.
+    """
+    with open(path) as file:
+        return resume_game(json.load(file), workers, headless)
+
+
+def winner(scores: List[int]) -> int:
+    """Return the index of the winning player, given the final <scores> of
+    all players.
+
+    The first player with the highest score wins.  If nobody scored, the
+    first player wins.
+
+    >>> winner([3, 7, 7])
+    1
+    >>> winner([0, 0])
+    0
+    """
+    max_score = 0
+    winning_player = 0
+    for i in range(len(scores)):
+        if scores[i] > max_score:
+            max_score = scores[i]
+            winning_player = i
+    return winning_player
+
+
+def auto_game(headless: bool = False) -> None:
     """Run a game with two computer players of different difficulty.
+
+    If <headless> is True, play it without a display.
     """
     random.seed(1001)
-    game = Game(4, 0, 0, [1, 4])
+    game = Game(4, 0, 0, [1, 4], headless=headless)
     game.run_game(10)
 
 
@@ -173,10 +458,11 @@ def sample_game() -> None:
 if __name__ == '__main__':
     # import python_ta
     # python_ta.check_all(config={
-    #     'allowed-io': ['run_game'],
+    #     'allowed-io': ['run_game', 'save_checkpoint', 'load_game'],
     #     'allowed-import-modules': [
-    #         'doctest', 'python_ta', 'random', 'typing',
-    #         'block', 'goal', 'player', 'renderer'
+    #         'doctest', 'python_ta', 'random', 'typing', 'time', 'base64',
+    #         'json', 'os', 'block', 'goal', 'player', 'renderer', 'linear',
+    #         'replay', 'metrics'
     #     ],
     # })
     # sample_game()
@@ -13,6 +13,7 @@ This file contains the Goal class hierarchy.
 
 from typing import List, Tuple
 from block import Block
+from colours import COLOUR_LIST, colour_index
 
 
 class Goal:
@@ -60,14 +61,10 @@ class BlobGoal(Goal):
 
          The score is always greater than or equal to 0.
         """
-        score = []
-        blocks = board.flatten()
-        for col in range(len(blocks)):
-            for element in range(len(blocks[col])):
-                if blocks[col][element] == self.colour:
-                    score.append(self._undiscovered_blob_size((col, element),
-                                                              blocks, []))
-        return max(score)
+        index = colour_index(self.colour)
+        if index < 0:
+            return 0
+        return board.blob_summary().largest()[index]
 
     def description(self) -> str:
         """Return a descripton of this PerimeterGoal.
@@ -113,28 +110,27 @@ class BlobGoal(Goal):
                 visited.append([])
                 for _ in range(len(board[i])):
                     visited[i].append(-1)
-        # if not visited
-        score = 0
-        lst = []
-        if visited[pos[0]][pos[1]] == -1:
-            # if it is the same colour, increase score by 1 and add it
-            # to the list. Update visited.
-            if board[pos[0]][pos[1]] == self.colour:
-                score += 1
-                visited[pos[0]][pos[1]] = 1
-                # now check the neighbors
-                for neighbor in neighbors(pos, board):
-                    # if there is a neighbor that is not visited, recurse
-                    if visited[neighbor[0]][neighbor[1]] == -1:
-                        lst.append(self._undiscovered_blob_size(neighbor,
-                                                                board,
-                                                                visited))
 
+        # Flood outwards from pos with an explicit stack, so that large
+        # blobs cannot exceed the recursion limit.
+        score = 0
+        stack = [pos]
+        while stack:
+            x, y = stack.pop()
+            if visited[x][y] == -1:
+                # if it is the same colour, increase score by 1 and queue
+                # up its unvisited neighbours. Update visited.
+                if board[x][y] == self.colour:
+                    score += 1
+                    visited[x][y] = 1
+                    for neighbor in neighbors((x, y), board):
+                        if visited[neighbor[0]][neighbor[1]] == -1:
+                            stack.append(neighbor)
                 # if it is not the same colour, update visited.
-            else:
-                visited[pos[0]][pos[1]] = 0
+                else:
+                    visited[x][y] = 0
 
-        return score + sum(lst)
+        return score
 
 
 # helper for _undiscovered_blob_size
@@ -185,33 +181,10 @@ class PerimeterGoal(Goal):
          [(1, 128, 181), (1, 128, 181), (199, 44, 58), (199, 44, 58)]]
 
          """
-        score = 0
-        lst = board.flatten()
-        # Relevant blocks are:
-        #   lst[0][:] (first column)
-        #   lst[len(lst) - 1][0] (last column)
-        #   and the first and last value of every column
-        perimeter = []
-        # add the first column
-        for i in lst[0]:
-            perimeter.append(i)
-
-        # add the bottom of every column but the first and last
-        for i in range(len(lst)):
-            perimeter.append(lst[i][len(lst[0]) - 1])
-        # add the last column
-        for i in lst[len(lst) - 1]:
-            perimeter.append(i)
-
-        # add the top of every column
-        for i in range(len(lst)):
-            perimeter.append(lst[i][0])
-
-        # get the score
-        for i in perimeter:
-            if i == self.colour:
-                score += 1
-        return score
+        index = colour_index(self.colour)
+        if index < 0:
+            return 0
+        return perimeter_counts(board)[index]
 
     def description(self) -> str:
         """Return a descripton of this BlobGoal.
@@ -221,12 +194,81 @@ class PerimeterGoal(Goal):
                "perimeter."
 
 
+def perimeter_counts(board: Block) -> List[int]:
+    """Return the number of unit cells of each colour in COLOUR_LIST along
+    the perimeter of <board>, in the same order as COLOUR_LIST.
+
+    Corner cells are counted twice, once for each edge they lie on.  Only
+    Blocks that touch an edge of <board> are visited, and a leaf counts its
+    whole length along each edge it touches in one step.
+
+    >>> import random
+    >>> from block import random_init
+    >>> random.seed(5)
+    >>> b = random_init(0, 2)
+    >>> perimeter_counts(b)
+    [9, 4, 1, 2]
+    """
+    counts = [0] * len(COLOUR_LIST)
+    _perimeter_walk(board, counts, True, True, True, True)
+    return counts
+
+
+def _perimeter_walk(block: Block, counts: List[int], top: bool, right: bool,
+                    bottom: bool, left: bool) -> None:
+    """A helper for perimeter_counts.
+
+    Add the perimeter cells within <block> to <counts>.  <top>, <right>,
+    <bottom> and <left> say which edges of the board <block> lies along.
+    """
+    children = block.children
+    if len(children) == 0:
+        edges = top + right + bottom + left
+        side = 2 ** (block.max_depth - block.level)
+        counts[colour_index(block.colour)] += edges * side
+    else:
+        if top or right:
+            _perimeter_walk(children[0], counts, top, right, False, False)
+        if top or left:
+            _perimeter_walk(children[1], counts, top, False, False, left)
+        if bottom or left:
+            _perimeter_walk(children[2], counts, False, False, bottom, left)
+        if bottom or right:
+            _perimeter_walk(children[3], counts, False, right, bottom, False)
+
+
+def score_goals(goals: List[Goal], board: Block) -> List[int]:
+    """Return the score of each goal in <goals> on <board>, in order.
+
+    The board's blobs are summarised at most once, and its perimeter walked
+    at most once, however many goals there are.
+    """
+    blobs = None
+    perimeter = None
+    scores = []
+    for goal in goals:
+        index = colour_index(goal.colour)
+        if index < 0:
+            scores.append(0)
+        elif isinstance(goal, BlobGoal):
+            if blobs is None:
+                blobs = board.blob_summary().largest()
+            scores.append(blobs[index])
+        elif isinstance(goal, PerimeterGoal):
+            if perimeter is None:
+                perimeter = perimeter_counts(board)
+            scores.append(perimeter[index])
+        else:
+            scores.append(goal.score(board))
+    return scores
+
+
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing',
-            'block', 'goal', 'player', 'renderer'
+            'block', 'goal', 'player', 'renderer', 'colours'
         ],
         'max-attributes': 15
     })
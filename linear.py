@@ -0,0 +1,599 @@
+"""Assignment 2 - Blocky
+
+=== CSC148 Fall 2017 ===
+Diane Horton and David Liu
+Department of Computer Science,
+University of Toronto
+
+
+=== Module Description ===
+
+This file contains a second way to store a board: a linear quadtree.
+
+Instead of a tree of Block objects, a LinearBoard keeps one array entry per
+undivided Block, sorted by the Morton code of its upper left unit cell.
+The unit cells of every Block are then a contiguous run of Morton codes, so
+the undivided Blocks within it are a contiguous slice of the arrays:
+rotating or swapping a Block permutes the bits of the codes in its slice,
+and flattening a board is a scatter into an array.
+
+LinearBlocks are views of the Blocks on a LinearBoard, with the same public
+interface as Block, so games, goals, players and renderers can use either.
+"""
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from colours import COLOUR_LIST, TEMPTING_TURQUOISE, BLACK
+from block import Block, SPLIT, cell_table, mix64, random_init
+from summary import BlobSummary, leaf_summary, merge_summaries
+
+# The Morton digit, 0 to 3 for upper-left, upper-right, lower-left and
+# lower-right, of each child of a Block, in the order of Block.children.
+CHILD_DIGITS = (1, 0, 2, 3)
+
+# The bits of a Morton code that hold column bits.
+_COLUMN_BITS = 0x5555555555555555
+
+# The Morton code of each unit cell of a board, by size and then by column
+# and row.
+_MORTON_TABLES = {}
+
+
+class LinearBoard:
+    """A Blocky board stored as a linear quadtree.
+
+    Every Block is identified by the Morton code of its upper left unit cell
+    and its level.  A Morton code interleaves the bits of the column and row
+    of a unit cell, row bits above column bits, so each pair of bits, from
+    the top, is the Morton digit of the cell's ancestor at the next level.
+
+    === Public Attributes ===
+    max_depth:
+        The deepest level allowed on this board.
+    codes:
+        The Morton code of each undivided Block, in increasing order.
+    levels:
+        The level of each undivided Block, in the same order.
+    colours:
+        The index in COLOUR_LIST of the colour of each undivided Block, in
+        the same order.
+
+    === Representation Invariants ===
+    - len(codes) == len(levels) == len(colours) >= 1
+    - the undivided Blocks cover every unit cell of the board exactly once
+    """
+    # === Private Attributes ===
+    # _geometry:
+    #     The x and y coordinates of the upper left corner of the board, and
+    #     its size, as last set by update_block_locations.
+    # _views:
+    #     The LinearBlock for each (code, level) that has been asked for, so
+    #     that the same Block is always the same object.
+    # _highlighted:
+    #     The (code, level) of each highlighted Block.
+    # _grids, _summaries, _keys:
+    #     The flattened grid, blob summary and key of Blocks, until a move
+    #     changes them.  Each is a list of dicts, one for each level, from
+    #     the code of a Block at that level to what is cached about it, so
+    #     that a move can find the Blocks within it without looking at any
+    #     others.
+    max_depth: int
+    codes: np.ndarray
+    levels: np.ndarray
+    colours: np.ndarray
+    _geometry: Tuple[int, int, int]
+    _views: Dict[Tuple[int, int], 'LinearBlock']
+    _highlighted: set
+    _grids: List[Dict[int, np.ndarray]]
+    _summaries: List[Dict[int, BlobSummary]]
+    _keys: List[Dict[int, int]]
+
+    def __init__(self, max_depth: int, codes: np.ndarray, levels: np.ndarray,
+                 colours: np.ndarray) -> None:
+        """Initialize this LinearBoard with the given undivided Blocks,
+        which must be sorted by <codes>.
+        """
+        self.max_depth = max_depth
+        self.codes = codes
+        self.levels = levels
+        self.colours = colours
+        self._geometry = (0, 0, 0)
+        self._views = {}
+        self._highlighted = set()
+        self._grids = [{} for _ in range(max_depth + 1)]
+        self._summaries = [{} for _ in range(max_depth + 1)]
+        self._keys = [{} for _ in range(max_depth + 1)]
+
+    def view(self, code: int, level: int) -> 'LinearBlock':
+        """Return the LinearBlock for the Block at level <level> whose upper
+        left unit cell has Morton code <code>.
+        """
+        block = self._views.get((code, level))
+        if block is None:
+            block = LinearBlock(self, code, level)
+            self._views[(code, level)] = block
+        return block
+
+    def span(self, code: int, level: int) -> Tuple[int, int]:
+        """Return the start and end of the slice of the arrays holding the
+        undivided Blocks within the Block at <code> and <level>.
+        """
+        end = code + 4 ** (self.max_depth - level)
+        return (int(self.codes.searchsorted(code)),
+                int(self.codes.searchsorted(end)))
+
+    def replace(self, start: int, end: int, codes: np.ndarray,
+                levels: np.ndarray, colours: np.ndarray) -> None:
+        """Replace the undivided Blocks in the slice from <start> to <end>
+        with the given ones, which must cover the same unit cells and need
+        not be sorted.
+        """
+        order = np.argsort(codes, kind='stable')
+        if end - start == len(codes):
+            self.codes[start:end] = codes[order]
+            self.levels[start:end] = levels[order]
+            self.colours[start:end] = colours[order]
+        else:
+            self.codes = np.concatenate((self.codes[:start], codes[order],
+                                         self.codes[end:]))
+            self.levels = np.concatenate((self.levels[:start], levels[order],
+                                          self.levels[end:]))
+            self.colours = np.concatenate((self.colours[:start],
+                                           colours[order],
+                                           self.colours[end:]))
+
+    def forget(self, code: int, level: int, moved: int = 0) -> None:
+        """Discard what is cached about the Block at <code> and <level>, its
+        ancestors and its descendants, before a move within it.
+
+        If <moved> is not 0, the move only moves the descendants, each to
+        the place whose code is its own XOR <moved>, so what is cached about
+        them is moved too.
+
+        The descendants are found by walking up from each undivided Block
+        within this one until a Block already found is reached, so a move
+        costs no more than the Blocks it changes, however much is cached.
+        """
+        depth = self.max_depth
+        start, end = self.span(code, level)
+        below = []
+        found = set()
+        for leaf, leaf_level in zip(self.codes[start:end].tolist(),
+                                    self.levels[start:end].tolist()):
+            for deeper in range(leaf_level, level, -1):
+                key = (leaf >> 2 * (depth - deeper), deeper)
+                if key in found:
+                    break
+                found.add(key)
+                below.append((leaf & -(1 << 2 * (depth - deeper)), deeper))
+        for cache in (self._grids, self._summaries, self._keys):
+            for ancestor in range(level + 1):
+                cache[ancestor].pop(code & -(1 << 2 * (depth - ancestor)),
+                                    None)
+            values = [cache[deeper].pop(key, None) for key, deeper in below]
+            if moved != 0:
+                for (key, deeper), value in zip(below, values):
+                    if value is not None:
+                        cache[deeper][key ^ moved] = value
+
+
+class LinearBlock:
+    """A view of one Block on a LinearBoard.
+
+    A LinearBlock stands for the Block at one place on the board, rather
+    than for a particular Block: after its parent is swapped or rotated, it
+    is the view of whichever Block moved into its place.  Views of places
+    that are no longer Blocks must not be used.
+
+    === Public Attributes ===
+    board:
+        The LinearBoard this is a view of.
+    code:
+        The Morton code of the upper left unit cell of this Block.
+    level:
+        The level of this Block.
+
+    === Representation Invariants ===
+    - code is a multiple of 4 ** (board.max_depth - level)
+    """
+    board: LinearBoard
+    code: int
+    level: int
+
+    __slots__ = ('board', 'code', 'level')
+
+    def __init__(self, board: LinearBoard, code: int, level: int) -> None:
+        """Initialize this view of the Block at <code> and <level> on
+        <board>.  Use LinearBoard.view rather than calling this directly.
+        """
+        self.board = board
+        self.code = code
+        self.level = level
+
+    @property
+    def max_depth(self) -> int:
+        """The deepest level allowed on this Block's board.
+        """
+        return self.board.max_depth
+
+    @property
+    def children(self) -> List['LinearBlock']:
+        """The Blocks into which this Block is subdivided, in the same order
+        as Block.children, or [] if it is undivided.
+        """
+        board = self.board
+        start = int(board.codes.searchsorted(self.code))
+        if board.levels[start] == self.level:
+            return []
+        quarter = 4 ** (board.max_depth - self.level - 1)
+        return [board.view(self.code + digit * quarter, self.level + 1)
+                for digit in CHILD_DIGITS]
+
+    @property
+    def parent(self) -> Optional['LinearBlock']:
+        """The Block that this Block is directly within, or None.
+        """
+        if self.level == 0:
+            return None
+        low = 4 ** (self.board.max_depth - self.level + 1) - 1
+        return self.board.view(self.code & ~low, self.level - 1)
+
+    @property
+    def colour(self) -> Optional[Tuple[int, int, int]]:
+        """The colour of this Block, or None if it is subdivided.
+        """
+        board = self.board
+        start = int(board.codes.searchsorted(self.code))
+        if board.levels[start] != self.level:
+            return None
+        return COLOUR_LIST[board.colours[start]]
+
+    @property
+    def highlighted(self) -> bool:
+        """True iff the user has selected this block for action.
+        """
+        return (self.code, self.level) in self.board._highlighted
+
+    @highlighted.setter
+    def highlighted(self, value: bool) -> None:
+        """Select or deselect this Block.
+        """
+        if value:
+            self.board._highlighted.add((self.code, self.level))
+        else:
+            self.board._highlighted.discard((self.code, self.level))
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        """The (x, y) coordinates of the upper left corner of this Block.
+        """
+        return self._geometry()[:2]
+
+    @property
+    def size(self) -> int:
+        """The height and width of this Block.
+        """
+        return self._geometry()[2]
+
+    def _geometry(self) -> Tuple[int, int, int]:
+        """Return the x and y coordinates of the upper left corner of this
+        Block and its size, following the layout of
+        Block.update_block_locations down from the board.
+        """
+        x, y, size = self.board._geometry
+        depth = self.board.max_depth
+        for level in range(1, self.level + 1):
+            digit = (self.code >> 2 * (depth - level)) & 3
+            size = round(size / 2.0)
+            if digit & 1:
+                x += size
+            if digit & 2:
+                y += size
+        return x, y, size
+
+    def update_block_locations(self, top_left: Tuple[int, int],
+                               size: int) -> None:
+        """Lay out the board with this Block, which must be the outermost
+        one, at <top_left> with height and width <size>.
+        """
+        self.board._geometry = (top_left[0], top_left[1], size)
+
+    def rectangles_to_draw(self) -> List[Tuple[Tuple[int, int, int],
+                                               Tuple[int, int],
+                                               Tuple[int, int],
+                                               int]]:
+        """Return a list of tuples describing all of the rectangles to be
+        drawn in order to render this Block, as Block.rectangles_to_draw
+        does.
+        """
+        board = self.board
+        start, end = board.span(self.code, self.level)
+        rectangles = []
+        for i in range(start, end):
+            block = board.view(int(board.codes[i]), int(board.levels[i]))
+            size = (block.size, block.size)
+            rectangles.append((COLOUR_LIST[board.colours[i]], block.position,
+                               size, 0))
+            rectangles.append((BLACK, block.position, size, 3))
+        for code, level in board._highlighted:
+            block = board.view(code, level)
+            if block.level >= self.level and \
+                    block.code >> 2 * (board.max_depth - self.level) == \
+                    self.code >> 2 * (board.max_depth - self.level):
+                size = (block.size, block.size)
+                if len(block.children) == 4:
+                    rectangles.append((BLACK, block.position, size, 3))
+                rectangles.append((TEMPTING_TURQUOISE, block.position, size,
+                                   5))
+        return rectangles
+
+    def swap(self, direction: int) -> None:
+        """Swap the child Blocks of this Block, vertically if <direction> is
+        1 and horizontally if it is 0.  If this Block has no children, or
+        <direction> is anything else, do nothing.
+
+        Swapping flips one bit of the Morton code of every undivided Block
+        within this one.
+        """
+        if direction not in (0, 1):
+            return
+        board = self.board
+        start, end = board.span(self.code, self.level)
+        if end - start < 2 and board.levels[start] == self.level:
+            return
+        bit = (1 if direction == 0 else 2) << \
+            2 * (board.max_depth - self.level - 1)
+        board.forget(self.code, self.level, bit)
+        board.replace(start, end, board.codes[start:end] ^ bit,
+                      board.levels[start:end], board.colours[start:end])
+
+    def rotate(self, direction: int) -> None:
+        """Rotate this Block and all its descendants, clockwise if
+        <direction> is 1 and counter-clockwise if it is 3.  If this Block has
+        no children, or <direction> is anything else, do nothing.
+
+        Rotating maps the column and row bits of each Morton digit within
+        this Block as the quarter turn maps quadrants.
+        """
+        if direction not in (1, 3):
+            return
+        board = self.board
+        start, end = board.span(self.code, self.level)
+        if end - start < 2 and board.levels[start] == self.level:
+            return
+        depth = board.max_depth
+        offsets = board.codes[start:end] - self.code
+        levels = board.levels[start:end].astype(np.int64)
+        # Only the digits between this Block and each undivided Block move;
+        # the ones below it are zero and stay so.
+        below = np.left_shift(np.int64(1), 2 * (depth - levels)) - 1
+        digits = np.int64(4 ** (depth - self.level) - 1) ^ below
+        columns = digits & np.int64(_COLUMN_BITS)
+        x = offsets & columns
+        y = (offsets >> 1) & columns
+        if direction == 1:
+            x, y = ~y & columns, x
+        else:
+            x, y = y, ~x & columns
+        board.forget(self.code, self.level)
+        board.replace(start, end, self.code + (x | (y << 1)),
+                      board.levels[start:end], board.colours[start:end])
+
+    def smash(self) -> bool:
+        """Smash this Block, as Block.smash does, and return True iff it
+        was smashed.
+
+        The new Blocks are made by block.random_init, so a LinearBoard and
+        a tree of Blocks seeded alike stay alike.
+        """
+        board = self.board
+        if self.level == 0 or self.level == board.max_depth:
+            return False
+        children = [random_init(self.level + 1, board.max_depth)
+                    for _ in range(4)]
+        quarter = 4 ** (board.max_depth - self.level - 1)
+        leaves = []
+        for digit, child in zip(CHILD_DIGITS, children):
+            _leaves(child, self.code + digit * quarter, board.max_depth,
+                    leaves)
+        start, end = board.span(self.code, self.level)
+        codes, levels, colours = _arrays(leaves)
+        board.forget(self.code, self.level)
+        board.replace(start, end, codes, levels, colours)
+        return True
+
+    def get_selected_block(self, location: Tuple[int, int], level: int) \
+            -> 'LinearBlock':
+        """Return the Block within this Block that includes the given
+        location and is at the given level, as Block.get_selected_block
+        does.
+
+        The unit cell under the location gives a Morton code, and the
+        undivided Block holding that code says how deep the board goes
+        there, so no Blocks between are visited.
+        """
+        x, y, size = self._geometry()
+        x = location[0] - x
+        y = location[1] - y
+        if not (0 <= x < size and 0 <= y < size):
+            return self if self.level == 0 else None
+        if self.level >= level:
+            return self
+        board = self.board
+        table = cell_table(size, board.max_depth - self.level)
+        code = self.code + int(_morton_table(board.max_depth - self.level)
+                               [table[x], table[y]])
+        start = int(board.codes.searchsorted(code, 'right')) - 1
+        level = min(level, int(board.levels[start]))
+        low = 4 ** (board.max_depth - level) - 1
+        return board.view(code & ~low, level)
+
+    def flatten(self) -> List[List[Tuple[int, int, int]]]:
+        """Return a two-dimensional list representing this Block as rows
+        and columns of unit cells, as Block.flatten does.
+        """
+        return [[COLOUR_LIST[index] for index in column]
+                for column in self.flatten_array().tolist()]
+
+    def flatten_array(self) -> np.ndarray:
+        """Return this Block as a read-only array of colour indices, as
+        Block.flatten_array does.
+
+        Each undivided Block is repeated once for each of its unit cells,
+        which gives the colours in Morton order, and those are then placed
+        by column and row.
+        """
+        board = self.board
+        grid = board._grids[self.level].get(self.code)
+        if grid is None:
+            start, end = board.span(self.code, self.level)
+            depth = board.max_depth - self.level
+            cells = np.repeat(board.colours[start:end],
+                              4 ** (board.max_depth -
+                                    board.levels[start:end].astype(np.int64)))
+            grid = cells[_morton_table(depth)]
+            grid.flags.writeable = False
+            board._grids[self.level][self.code] = grid
+        return grid
+
+    def blob_summary(self) -> BlobSummary:
+        """Return the summary of the blobs within this Block, as
+        Block.blob_summary does.
+        """
+        board = self.board
+        summary = board._summaries[self.level].get(self.code)
+        if summary is None:
+            children = self.children
+            if len(children) == 0:
+                start = int(board.codes.searchsorted(self.code))
+                summary = leaf_summary(int(board.colours[start]),
+                                       2 ** (board.max_depth - self.level))
+            else:
+                summary = merge_summaries([child.blob_summary()
+                                           for child in children])
+            board._summaries[self.level][self.code] = summary
+        return summary
+
+    def key(self) -> int:
+        """Return the same 64-bit key as Block.key would for this Block.
+        """
+        board = self.board
+        key = board._keys[self.level].get(self.code)
+        if key is None:
+            children = self.children
+            if len(children) == 0:
+                start = int(board.codes.searchsorted(self.code))
+                key = mix64(self.level * 8 + int(board.colours[start]))
+            else:
+                key = mix64(self.level * 8 + SPLIT)
+                for child in children:
+                    key = mix64(key ^ child.key())
+            board._keys[self.level][self.code] = key
+        return key
+
+    def get_all_blocks(self) -> List['LinearBlock']:
+        """Return this Block and all the Blocks within it, in the same order
+        as Block.get_all_blocks.
+        """
+        blocks = [self]
+        for child in self.children:
+            blocks.extend(child.get_all_blocks())
+        return blocks
+
+    def cell_origin(self) -> Tuple[int, int]:
+        """Return the column and row of the upper left unit cell of this
+        Block, as Block.cell_origin does.
+        """
+        code = self.code
+        x = y = 0
+        bit = 0
+        while code:
+            x |= (code & 1) << bit
+            y |= ((code >> 1) & 1) << bit
+            code >>= 2
+            bit += 1
+        return x, y
+
+
+def linearize(block: Block) -> LinearBlock:
+    """Return the outermost LinearBlock of a new LinearBoard with the same
+    Blocks, and layout, as the outermost Block <block>.
+
+    >>> import random
+    >>> from block import random_init
+    >>> random.seed(5)
+    >>> b = random_init(0, 3)
+    >>> linear = linearize(b)
+    >>> linear.key() == b.key()
+    True
+    >>> b.children[0].rotate(1)
+    >>> linear.children[0].rotate(1)
+    >>> b.swap(1)
+    >>> linear.swap(1)
+    >>> linear.key() == b.key()
+    True
+    """
+    leaves = []
+    _leaves(block, 0, block.max_depth, leaves)
+    codes, levels, colours = _arrays(leaves)
+    order = np.argsort(codes, kind='stable')
+    board = LinearBoard(block.max_depth, codes[order], levels[order],
+                        colours[order])
+    root = board.view(0, 0)
+    root.update_block_locations(block.position, block.size)
+    return root
+
+
+def _leaves(block: Block, code: int, max_depth: int,
+            leaves: List[Tuple[int, int, int]]) -> None:
+    """A helper for linearize and LinearBlock.smash.
+
+    Add the Morton code, level and colour index of each undivided Block
+    within <block>, whose upper left unit cell has Morton code <code>, to
+    <leaves>.
+    """
+    if len(block.children) == 0:
+        leaves.append((code, block.level, COLOUR_LIST.index(block.colour)))
+    else:
+        quarter = 4 ** (max_depth - block.level - 1)
+        for digit, child in zip(CHILD_DIGITS, block.children):
+            _leaves(child, code + digit * quarter, max_depth, leaves)
+
+
+def _arrays(leaves: List[Tuple[int, int, int]]) \
+        -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """A helper for linearize and LinearBlock.smash.
+
+    Return the codes, levels and colours of <leaves> as arrays.
+    """
+    codes, levels, colours = zip(*leaves)
+    return (np.array(codes, dtype=np.int64), np.array(levels, dtype=np.int8),
+            np.array(colours, dtype=np.uint8))
+
+
+def _morton_table(depth: int) -> np.ndarray:
+    """Return the Morton code of each unit cell of a Block <depth> levels
+    above the unit cells, indexed by column and then row.
+
+    >>> _morton_table(1).tolist()
+    [[0, 2], [1, 3]]
+    """
+    table = _MORTON_TABLES.get(depth)
+    if table is None:
+        side = 2 ** depth
+        spread = np.zeros(side, dtype=np.int64)
+        for bit in range(depth):
+            spread |= ((np.arange(side) >> bit) & 1) << (2 * bit)
+        table = spread[:, None] | (spread[None, :] << 1)
+        _MORTON_TABLES[depth] = table
+    return table
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', 'numpy',
+            'block', 'colours', 'summary'
+        ],
+        'max-attributes': 15
+    })
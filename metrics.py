@@ -0,0 +1,271 @@
+"""Assignment 2 - Blocky
+
+=== CSC148 Fall 2017 ===
+Diane Horton and David Liu
+Department of Computer Science,
+University of Toronto
+
+
+=== Module Description ===
+
+This file contains the Metrics class, which records where the time goes in
+a game, turn by turn, and functions to export what it recorded.
+
+Each turn is split into four phases:
+    search:   choosing a move, apart from the other three phases; for a
+              HumanPlayer, this is the time spent waiting for input
+    scoring:  scoring goals on candidate boards
+    mutation: applying and undoing moves
+    draw:     drawing the board, and pausing so a move can be seen
+and three counts are kept: the goals scored, the Blocks flattened, and the
+positions a player visited while choosing its move.
+
+Timing a move or a score costs two calls to time.perf_counter and one to
+Metrics.add, well under a microsecond, while scoring a goal takes tens of
+microseconds, so metrics can be left on.  A summary of the recorded turns
+can be written as JSON, or as a Prometheus text file for node_exporter's
+textfile collector.  For example, after
+
+    metrics = Metrics()
+    game.run_game(10, metrics=metrics)
+    write_prometheus(metrics.summary(), 'blocky.prom')
+
+blocky.prom holds the seconds each player spent in each phase.
+"""
+import json
+import os
+from typing import Dict, List
+
+# The phases each turn is split into.
+PHASES = ['search', 'scoring', 'mutation', 'draw']
+
+# The counts kept for each turn.
+COUNTERS = ['score_calls', 'flatten_calls', 'nodes_visited']
+
+# The help text of each metric written by prometheus, by field.
+_HELP = {
+    'turns': 'Turns played.',
+    'seconds': 'Seconds spent on turns.',
+    'slowest': 'Seconds taken by the slowest turn.',
+    'score_calls': 'Goals scored while choosing moves.',
+    'flatten_calls': 'Blocks flattened while choosing moves.',
+    'nodes_visited': 'Positions visited while choosing moves.'
+}
+
+
+class Metrics:
+    """The time spent in each phase of each turn of a game, and the counts
+    of the work done.
+
+    === Public Attributes ===
+    turns:
+        The record of each turn ended so far, in order.  Each is a dict of
+        the index of the player who moved ('player'), the seconds the turn
+        took ('seconds'), the seconds spent in each of PHASES and the count
+        of each of COUNTERS.
+
+    === Representation Invariants ===
+    - the phases of each record in turns add up to its seconds
+    """
+    turns: List[Dict]
+    # === Private Attributes ===
+    # _current:
+    #     The seconds of each phase apart from search, and each count,
+    #     recorded so far in the turn under way.
+    _current: Dict[str, float]
+
+    def __init__(self) -> None:
+        """Initialize this Metrics with no turns recorded.
+        """
+        self.turns = []
+        self._current = _blank()
+
+    def start_turn(self) -> None:
+        """Begin a new turn, forgetting anything recorded since the last
+        turn ended.
+        """
+        self._current = _blank()
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add <seconds> to the time spent in <phase> in the turn under way.
+
+        Precondition: phase in PHASES and phase != 'search'
+        """
+        self._current[phase] += seconds
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        """Add <amount> to <counter> in the turn under way.
+
+        Precondition: counter in COUNTERS
+        """
+        self._current[counter] += amount
+
+    def end_turn(self, player: int, seconds: float) -> None:
+        """End the turn under way, made by the player at index <player> and
+        taking <seconds> in all.  Whatever time the other phases do not
+        account for is counted as search.
+
+        >>> metrics = Metrics()
+        >>> metrics.add('scoring', 0.25)
+        >>> metrics.count('score_calls', 5)
+        >>> metrics.end_turn(1, 1.0)
+        >>> metrics.turns[0]['search'], metrics.turns[0]['score_calls']
+        (0.75, 5)
+        """
+        record = self._current
+        record['search'] = max(0.0, seconds - record['scoring'] -
+                               record['mutation'] - record['draw'])
+        record['player'] = player
+        record['seconds'] = seconds
+        self.turns.append(record)
+        self._current = _blank()
+
+    def summary(self) -> Dict[str, List[float]]:
+        """Return the totals of the turns ended so far, for each player.
+
+        The summary maps 'turns', 'seconds', each of PHASES and each of
+        COUNTERS to a list of the total for each player, by index, and
+        'slowest' to the seconds taken by each player's slowest turn.  It
+        can be written as JSON.
+
+        >>> metrics = Metrics()
+        >>> metrics.add('draw', 0.5)
+        >>> metrics.end_turn(1, 2.0)
+        >>> metrics.end_turn(1, 3.0)
+        >>> summary = metrics.summary()
+        >>> summary['turns'], summary['seconds'], summary['search']
+        ([0, 2], [0.0, 5.0], [0.0, 4.5])
+        >>> summary['slowest']
+        [0.0, 3.0]
+        """
+        players = 1 + max((record['player'] for record in self.turns),
+                          default=-1)
+        totals = {field: [0] * players for field in ['turns'] + COUNTERS}
+        for field in ['seconds', 'slowest'] + PHASES:
+            totals[field] = [0.0] * players
+        for record in self.turns:
+            player = record['player']
+            totals['turns'][player] += 1
+            totals['slowest'][player] = max(totals['slowest'][player],
+                                            record['seconds'])
+            for field in ['seconds'] + PHASES + COUNTERS:
+                totals[field][player] += record[field]
+        return totals
+
+
+def _blank() -> Dict[str, float]:
+    """A helper for Metrics.
+
+    Return the record of a turn in which nothing has been recorded yet.
+    """
+    record = dict.fromkeys(PHASES, 0.0)
+    record.update(dict.fromkeys(COUNTERS, 0))
+    return record
+
+
+def combine(summaries: List[Dict[str, List[float]]]) \
+        -> Dict[str, List[float]]:
+    """Return the summary of all the turns summarised in <summaries>, as
+    returned by Metrics.summary, such as those of many games with the same
+    players.
+
+    >>> first = {'turns': [2], 'slowest': [1.5], 'seconds': [2.0]}
+    >>> second = {'turns': [1, 4], 'slowest': [0.5, 1.0], 'seconds': [1, 2]}
+    >>> combine([first, second])
+    {'turns': [3, 4], 'slowest': [1.5, 1.0], 'seconds': [3.0, 2]}
+    """
+    totals = {}
+    for summary in summaries:
+        for field, values in summary.items():
+            old = totals.setdefault(field, [])
+            for player, value in enumerate(values):
+                if player == len(old):
+                    old.append(value)
+                elif field == 'slowest':
+                    old[player] = max(old[player], value)
+                else:
+                    old[player] += value
+    return totals
+
+
+def prometheus(summary: Dict[str, List[float]],
+               prefix: str = 'blocky') -> str:
+    """Return <summary>, as returned by Metrics.summary or combine, in the
+    Prometheus text format, with every metric name starting with <prefix>.
+
+    Each metric is labelled with the player's index; the seconds spent in
+    each phase are one metric, labelled with the phase as well.
+
+    >>> text = prometheus({'turns': [3], 'seconds': [1.5], 'slowest': [0.75],
+    ...                    'search': [1.0], 'scoring': [0.5], 'mutation': [0],
+    ...                    'draw': [0], 'score_calls': [8],
+    ...                    'flatten_calls': [0], 'nodes_visited': [8]})
+    >>> print('\\n'.join(text.splitlines()[:3]))
+    # HELP blocky_turns_total Turns played.
+    # TYPE blocky_turns_total counter
+    blocky_turns_total{player="0"} 3
+    >>> [line for line in text.splitlines() if 'phase="scoring"' in line]
+    ['blocky_phase_seconds_total{player="0",phase="scoring"} 0.5']
+    """
+    lines = []
+    for field in ['turns', 'seconds', 'slowest'] + COUNTERS:
+        if field == 'slowest':
+            name = f'{prefix}_slowest_turn_seconds'
+            kind = 'gauge'
+        elif field == 'seconds':
+            name = f'{prefix}_turn_seconds_total'
+            kind = 'counter'
+        else:
+            name = f'{prefix}_{field}_total'
+            kind = 'counter'
+        lines.append(f'# HELP {name} {_HELP[field]}')
+        lines.append(f'# TYPE {name} {kind}')
+        for player, value in enumerate(summary[field]):
+            lines.append(f'{name}{{player="{player}"}} {value}')
+
+    name = f'{prefix}_phase_seconds_total'
+    lines.append(f'# HELP {name} Seconds spent on turns, by phase.')
+    lines.append(f'# TYPE {name} counter')
+    for phase in PHASES:
+        for player, value in enumerate(summary[phase]):
+            lines.append(f'{name}{{player="{player}",phase="{phase}"}} '
+                         f'{value}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_json(summary: Dict[str, List[float]], path: str) -> None:
+    """Write <summary> to the file at <path> as JSON.
+
+    Like the files written by write_prometheus, the file is replaced in one
+    step, so it can be read while it is being rewritten.
+    """
+    _replace(path, json.dumps(summary))
+
+
+def write_prometheus(summary: Dict[str, List[float]], path: str) -> None:
+    """Write <summary> to the file at <path> in the Prometheus text format.
+
+    The file is replaced in one step, as node_exporter's textfile collector
+    requires, so it can be rewritten after every game while it is scraped.
+    """
+    _replace(path, prometheus(summary))
+
+
+def _replace(path: str, text: str) -> None:
+    """A helper for write_json and write_prometheus.
+
+    Replace the contents of the file at <path> with <text> in one step.
+    """
+    with open(path + '.tmp', 'w') as file:
+        file.write(text)
+    os.replace(path + '.tmp', path)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', 'json', 'os'
+        ],
+        'max-attributes': 15
+    })
@@ -0,0 +1,332 @@
+"""Assignment 2 - Blocky
+
+=== CSC148 Fall 2017 ===
+Diane Horton and David Liu
+Department of Computer Science,
+University of Toronto
+
+
+=== Module Description ===
+
+This file runs tournaments: many headless games between computer players,
+played in parallel worker processes.  The result of each game is written as
+one line of JSON as soon as it is known, in seed order, so a tournament can
+be watched as it runs and any game can be replayed from its seed.
+
+For example, to play 1000 games on a board of depth 4 between a random
+player and SmartPlayers of difficulty 1 and 4, using 8 processes:
+
+    python play.py --depth 4 --random 1 --smart 1 4 --seeds 0:1000 \\
+        --processes 8 --output results.jsonl
+
+If it is stopped, running it again with --resume plays only the games not
+yet in results.jsonl.  A single long game can be checkpointed and resumed
+with Game.run_game and game.load_game instead.
+
+With --metrics blocky.prom, each result also holds the seconds its players
+spent searching, scoring, making moves and drawing, and blocky.prom is
+rewritten after every game with the totals so far, for Prometheus.
+--metrics-json keeps the same totals in a JSON file instead, or as well.
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, TextIO
+from game import Game, winner
+from colours import colour_name
+from metrics import Metrics, combine, write_json, write_prometheus
+from replay import moves_to_json
+
+# The number of turns each player gets, if not given.
+DEFAULT_TURNS = 10
+
+
+class Match:
+    """The players and rules shared by every game of a tournament.
+
+    === Public Attributes ===
+    max_depth:
+        The max_depth of every board.
+    random_players:
+        The number of RandomPlayers in each game.
+    smart_players:
+        The difficulty of each SmartPlayer in each game.
+    search_players:
+        The search depth of each SearchPlayer in each game.
+    turns:
+        The number of turns each player gets.
+    backend:
+        How boards are stored, as for Game.
+    record:
+        True iff each game's initial board and moves are kept in its result,
+        so that it can be replayed with replay.py.
+    metrics:
+        True iff each game's result holds a summary of its metrics, as
+        recorded by metrics.Metrics.
+    seeded:
+        True iff each game's board is made from its seed by
+        block.seeded_init, rather than by the seeded random module.
+
+    === Representation Invariants ===
+    - 2 <= max_depth <= 5
+    - random_players + len(smart_players) + len(search_players) >= 1
+    - turns >= 1
+    """
+    max_depth: int
+    random_players: int
+    smart_players: List[int]
+    search_players: List[int]
+    turns: int
+    backend: str
+    record: bool
+    metrics: bool
+    seeded: bool
+
+    def __init__(self, max_depth: int, random_players: int,
+                 smart_players: List[int], search_players: List[int],
+                 turns: int = DEFAULT_TURNS, backend: str = 'tree',
+                 record: bool = False, metrics: bool = False,
+                 seeded: bool = False) -> None:
+        """Initialize this Match with the given attributes.
+        """
+        self.max_depth = max_depth
+        self.random_players = random_players
+        self.smart_players = smart_players
+        self.search_players = search_players
+        self.turns = turns
+        self.backend = backend
+        self.record = record
+        self.metrics = metrics
+        self.seeded = seeded
+
+    def play(self, seed: int) -> Dict:
+        """Play one headless game of this Match, seeding the random module
+        with <seed>, and return its result.
+
+        The result records the seed, the winner's index, each player's kind,
+        goal and final score, the number of moves made and the average
+        number of seconds each player took per move.  Playing the same seed
+        again gives the same game, apart from the timings.
+
+        If this Match records games, the result also holds the encoded
+        initial board, in base64, and the record of every move.  If it
+        keeps metrics, the result also holds their summary.
+        """
+        random.seed(seed)
+        game = Game(self.max_depth, 0, self.random_players,
+                    self.smart_players, search_players=self.search_players,
+                    headless=True, backend=self.backend,
+                    board_seed=seed if self.seeded else None)
+        metrics = Metrics() if self.metrics else None
+        start = time.perf_counter()
+        scores = game.run_game(self.turns, verbose=False, metrics=metrics)
+        elapsed = time.perf_counter() - start
+
+        seconds = [0.0] * len(game.players)
+        moves = [0] * len(game.players)
+        for i in range(len(game.move_times)):
+            seconds[i % len(game.players)] += game.move_times[i]
+            moves[i % len(game.players)] += 1
+        result = {
+            'seed': seed,
+            'winner': winner(scores),
+            'scores': scores,
+            'players': [type(player).__name__ for player in game.players],
+            'goals': [f'{type(player.goal).__name__} ' +
+                      f'{colour_name(player.goal.colour)}'
+                      for player in game.players],
+            'turns': len(game.move_times),
+            'seconds_per_move': [seconds[i] / max(moves[i], 1)
+                                 for i in range(len(game.players))],
+            'seconds': elapsed
+        }
+        if self.record:
+            result['board'] = base64.b64encode(game.initial_board).decode(
+                'ascii')
+            result['moves'] = moves_to_json(game.moves)
+        if metrics is not None:
+            result['metrics'] = metrics.summary()
+        return result
+
+
+def tournament(match: Match, seeds: Iterable[int], output: TextIO,
+               processes: Optional[int] = None,
+               metrics: Optional[str] = None,
+               totals: Optional[Dict[str, List[float]]] = None,
+               metrics_json: Optional[str] = None) -> List[int]:
+    """Play a game of <match> for every seed in <seeds>, writing the result
+    of each to <output> as a line of JSON, and return the number of games
+    each player won.
+
+    Games are played by <processes> worker processes, or by one per CPU if
+    <processes> is None, or in this process if <processes> is 0.  Results
+    are written in the order of <seeds> whichever finishes first.
+
+    If <metrics> is not None, <match> must keep metrics, and their totals
+    over the games played so far are written to the file of that name, in
+    the Prometheus text format, after each game.  If <metrics_json> is not
+    None, the same totals are written to the file of that name as JSON, and
+    <match> must keep metrics too.  If <totals> is not None, it is the
+    summary of the metrics of games played earlier, such as those of a
+    tournament being resumed, and the totals written include it.
+    """
+    players = match.random_players + len(match.smart_players) + \
+        len(match.search_players)
+    wins = [0] * players
+    if totals is None:
+        totals = {}
+    if len(totals) > 0:
+        _write_totals(totals, metrics, metrics_json)
+    seeds = list(seeds)
+    if processes == 0:
+        results = map(match.play, seeds)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes)
+        # Small chunks keep the output flowing without a round trip per game.
+        chunk = max(1, len(seeds) // (4 * (processes or
+                                           multiprocessing.cpu_count())))
+        results = pool.imap(match.play, seeds, min(chunk, 16))
+    try:
+        for result in results:
+            wins[result['winner']] += 1
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            if metrics is not None or metrics_json is not None:
+                totals = combine([totals, result['metrics']])
+                _write_totals(totals, metrics, metrics_json)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return wins
+
+
+def _write_totals(totals: Dict[str, List[float]], metrics: Optional[str],
+                  metrics_json: Optional[str]) -> None:
+    """A helper for tournament.
+
+    Write <totals> to the Prometheus text file <metrics> and the JSON file
+    <metrics_json>, skipping either that is None.
+    """
+    if metrics is not None:
+        write_prometheus(totals, metrics)
+    if metrics_json is not None:
+        write_json(totals, metrics_json)
+
+
+def finished_games(path: str) -> List[Dict]:
+    """Return the results already written to the JSON Lines file at <path>,
+    or [] if there is no such file, and rewrite it without any result that
+    was cut off part way.
+    """
+    if not os.path.exists(path):
+        return []
+    results = []
+    with open(path) as file:
+        for line in file:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    with open(path, 'w') as file:
+        for result in results:
+            file.write(json.dumps(result) + '\n')
+    return results
+
+
+def parse_seeds(text: str) -> List[int]:
+    """Return the seeds described by <text>: either a comma-separated list of
+    seeds, or a range start:stop of seeds.
+
+    >>> parse_seeds('3,1,4')
+    [3, 1, 4]
+    >>> parse_seeds('10:13')
+    [10, 11, 12]
+    """
+    if ':' in text:
+        start, stop = text.split(':')
+        return list(range(int(start), int(stop)))
+    return [int(seed) for seed in text.split(',')]
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Run a tournament as described by the command line <args>, or by
+    sys.argv if <args> is None, and print the number of games each player
+    won.
+    """
+    parser = argparse.ArgumentParser(
+        description='Play many headless games of Blocky in parallel.')
+    parser.add_argument('--depth', type=int, default=4,
+                        help='max_depth of the board (2 to 5)')
+    parser.add_argument('--random', type=int, default=0,
+                        help='number of RandomPlayers')
+    parser.add_argument('--smart', type=int, nargs='*', default=[],
+                        help='difficulty of each SmartPlayer')
+    parser.add_argument('--search', type=int, nargs='*', default=[],
+                        help='search depth of each SearchPlayer')
+    parser.add_argument('--turns', type=int, default=DEFAULT_TURNS,
+                        help='turns per player')
+    parser.add_argument('--seeds', type=parse_seeds, default='0:100',
+                        help='seeds to play, as a:b or a,b,c')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: one per CPU; '
+                             '0 plays in this process)')
+    parser.add_argument('--backend', choices=['tree', 'linear'],
+                        default='tree', help='how boards are stored')
+    parser.add_argument('--seeded', action='store_true',
+                        help='make each board from its seed with '
+                             'block.seeded_init')
+    parser.add_argument('--record', action='store_true',
+                        help='keep every move, for replay.py')
+    parser.add_argument('--output', default='-',
+                        help='JSON Lines file to write (default: stdout)')
+    parser.add_argument('--resume', action='store_true',
+                        help='keep the games already in --output and play '
+                             'only the rest')
+    parser.add_argument('--metrics', default=None,
+                        help='Prometheus text file to keep the time spent '
+                             'in each phase of the players\' turns in')
+    parser.add_argument('--metrics-json', default=None,
+                        help='JSON file to keep the same totals in')
+    options = parser.parse_args(args)
+    if options.resume and options.output == '-':
+        parser.error('--resume needs the --output file to resume')
+
+    match = Match(options.depth, options.random, options.smart,
+                  options.search, options.turns, options.backend,
+                  options.record, options.metrics is not None or
+                  options.metrics_json is not None, options.seeded)
+    if options.output == '-':
+        wins = tournament(match, options.seeds, sys.stdout,
+                          options.processes, options.metrics,
+                          metrics_json=options.metrics_json)
+    else:
+        finished = []
+        if options.resume:
+            finished = finished_games(options.output)
+        done = {result['seed'] for result in finished}
+        wanted = set(options.seeds)
+        with open(options.output, 'a' if options.resume else 'w') as output:
+            wins = tournament(match, [seed for seed in options.seeds
+                                      if seed not in done],
+                              output, options.processes, options.metrics,
+                              combine([result['metrics']
+                                       for result in finished
+                                       if result['seed'] in wanted and
+                                       'metrics' in result]),
+                              options.metrics_json)
+        for result in finished:
+            if result['seed'] in wanted:
+                wins[result['winner']] += 1
+    for i in range(len(wins)):
+        print(f'Player {i} won {wins[i]} of {len(options.seeds)} games',
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
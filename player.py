@@ -12,14 +12,30 @@ This file contains the player class hierarchy.
 """
 
 import random
-from typing import Optional
-import pygame
+import math
+import time
+import multiprocessing
+import multiprocessing.pool
+from multiprocessing import shared_memory
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
 from renderer import Renderer
-from block import Block
-from goal import Goal
+try:
+    import pygame
+except ImportError:
+    pygame = None
+from block import Block, encode, decode
+from goal import Goal, score_goals
+from metrics import Metrics
 
 TIME_DELAY = 600
 
+# The kinds of value stored in SearchPlayer's transposition table.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
 
 class Player:
     """A player in the Blocky game.
@@ -35,10 +51,18 @@ class Player:
         for example as "Player 2"
     goal:
         This player's assigned goal for the game.
+    last_move:
+        The Block this player changed on its last turn and the move it made
+        there, numbered as in apply_move, or None if it made no move.
+    metrics:
+        Where the time this player spends on its turns and the work it does
+        are recorded, or None if they are not.
     """
     renderer: Renderer
     id: int
     goal: Goal
+    last_move: Optional[Tuple[Block, int]]
+    metrics: Optional[Metrics]
 
     def __init__(self, renderer: Renderer, player_id: int, goal: Goal) -> None:
         """Initialize this Player.
@@ -46,6 +70,8 @@ class Player:
         self.goal = goal
         self.renderer = renderer
         self.id = player_id
+        self.last_move = None
+        self.metrics = None
 
     def make_move(self, board: Block) -> int:
         """Choose a move to make on the given board, and apply it, mutating
@@ -55,11 +81,57 @@ class Player:
         """
         raise NotImplementedError
 
+    def close(self) -> None:
+        """Shut down any worker processes this player has started.
+        """
+
+    def _apply(self, block: Block, move: int) -> None:
+        """Apply the move numbered <move> to <block>, as apply_move does,
+        recording the time taken as mutation in metrics.
+        """
+        if self.metrics is None:
+            apply_move(block, move)
+        else:
+            start = time.perf_counter()
+            apply_move(block, move)
+            self.metrics.add('mutation', time.perf_counter() - start)
+
+    def _score(self, board: Block) -> int:
+        """Return this player's score on <board>, recording the time taken
+        as scoring in metrics.
+        """
+        if self.metrics is None:
+            return self.goal.score(board)
+        start = time.perf_counter()
+        score = self.goal.score(board)
+        self.metrics.add('scoring', time.perf_counter() - start)
+        self.metrics.count('score_calls')
+        return score
+
+    def _draw(self, board: Block) -> None:
+        """Draw <board> on this player's turn, recording the time taken as
+        drawing in metrics.
+        """
+        start = time.perf_counter()
+        self.renderer.draw(board, self.id)
+        if self.metrics is not None:
+            self.metrics.add('draw', time.perf_counter() - start)
+
+    def _pause(self) -> None:
+        """Pause for TIME_DELAY so that a move can be seen before it is made,
+        recording the time taken as drawing in metrics.
+        """
+        start = time.perf_counter()
+        self.renderer.wait(TIME_DELAY)
+        if self.metrics is not None:
+            self.metrics.add('draw', time.perf_counter() - start)
+
 
 class HumanPlayer(Player):
     """A human player.
 
-    A HumanPlayer can do a limited number of smashes.
+    A HumanPlayer can do a limited number of smashes.  It reads the mouse
+    and keyboard through pygame, so it cannot play a headless game.
 
     === Public Attributes ===
     num_smashes:
@@ -99,7 +171,7 @@ class HumanPlayer(Player):
         self._selected_block = None
 
     def process_event(self, board: Block,
-                      event: pygame.event.Event) -> Optional[int]:
+                      event: 'pygame.event.Event') -> Optional[int]:
         """Process the given pygame <event>.
 
         Identify the selected block and mark it as highlighted.  Then identify
@@ -132,7 +204,13 @@ class HumanPlayer(Player):
         self._level = block.level
 
         if event.type == pygame.MOUSEBUTTONDOWN:
-            block.rotate(event.button)
+            # Only the left and right buttons rotate; the middle button and
+            # the scroll wheel do nothing.
+            if event.button not in (1, 3):
+                return None
+            move = 1 if event.button == 1 else 2
+            self._apply(block, move)
+            self.last_move = (block, move)
             return 1
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_UP:
@@ -146,23 +224,26 @@ class HumanPlayer(Player):
                 return None
 
             elif event.key == pygame.K_h:
-                block.swap(0)
+                self._apply(block, 3)
+                self.last_move = (block, 3)
                 return 1
 
             elif event.key == pygame.K_v:
-                block.swap(1)
+                self._apply(block, 4)
+                self.last_move = (block, 4)
                 return 1
 
             elif event.key == pygame.K_s:
                 if self.num_smashes >= self.MAX_SMASHES:
                     print('Can\'t smash again!')
                     return 0
-                if block.smash():
-                    self.num_smashes += 1
-                    return 1
-                else:
+                if block.level == 0 or block.level == block.max_depth:
                     print('Tried to smash at an invalid depth!')
                     return 0
+                self._apply(block, SMASH)
+                self.num_smashes += 1
+                self.last_move = (block, SMASH)
+                return 1
 
     def make_move(self, board: Block) -> int:
         """Choose a move to make on the given board, and apply it, mutating
@@ -174,28 +255,32 @@ class HumanPlayer(Player):
         """
         self._level = 0
         self._selected_block = board
+        self.last_move = None
 
         # Remove all previous events from the queue in case the other players
         # have added events to the queue accidentally.
         pygame.event.clear()
 
         # Keep checking the moves performed by the player until a valid move
-        # has been completed. Draw the board on every loop to draw the
-        # selected block properly on screen.
+        # has been completed.  Sleep until the next event rather than
+        # polling, and draw the board again only when an event changes the
+        # selected block or the board.
+        self._draw(board)
         while True:
-            self.renderer.draw(board, self.id)
-            # loop through all of the events within the event queue
-            # (all pending events from the user input)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return 1
-
-                result = self.process_event(board, event)
-                self.renderer.draw(board, self.id)
-                if result is not None and result > 0:
-                    # un-highlight the selected block
-                    self._selected_block.highlighted = False
-                    return 0
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                return 1
+
+            selected = self._selected_block
+            highlighted = selected.highlighted
+            result = self.process_event(board, event)
+            if result is not None or self._selected_block is not selected \
+                    or not highlighted:
+                self._draw(board)
+            if result is not None and result > 0:
+                # un-highlight the selected block
+                self._selected_block.highlighted = False
+                return 0
 
 
 class RandomPlayer(Player):
@@ -245,6 +330,7 @@ class RandomPlayer(Player):
         This method will hold focus until a valid move is performed.
         """
 
+        self.last_move = None
         # Get all the available blocks
         list_ = board.get_all_blocks()
         block = random.randint(0, len(list_) - 1)
@@ -254,8 +340,8 @@ class RandomPlayer(Player):
         self._selected_block.highlighted = True
 
         # Draw the board and run the time delay
-        self.renderer.draw(board, self.id)
-        pygame.time.wait(TIME_DELAY)
+        self._draw(board)
+        self._pause()
 
         # Choose a random move
         index = random.randint(0, 4)
@@ -264,24 +350,21 @@ class RandomPlayer(Player):
             # If at main block or unit cell, forfit.
             if self._selected_block.level > 0 and self._selected_block.level \
                     != self._selected_block.max_depth:
-                self._selected_block.smash()
+                self._apply(self._selected_block, SMASH)
+                self.last_move = (self._selected_block, SMASH)
             else:
                 # redraw the board and forfeit.
                 self._selected_block.highlighted = False
-                self.renderer.draw(board, self.id)
+                self._draw(board)
                 return 0
                 # return 1
-        elif index == 1:
-            self._selected_block.rotate(1)
-        elif index == 2:
-            self._selected_block.rotate(3)
-        elif index == 3:
-            self._selected_block.swap(0)
-        elif index == 4:
-            self._selected_block.swap(1)
+        else:
+            # Moves 1 to 4 are numbered as in apply_move.
+            self._apply(self._selected_block, index)
+            self.last_move = (self._selected_block, index)
 
         self._selected_block.highlighted = False
-        self.renderer.draw(board, self.id)
+        self._draw(board)
 
         return 0
 
@@ -294,9 +377,13 @@ class SmartPlayer(Player):
     === Public Attributes ===
     # difficulty
     #     The difficulty level of this player
+    workers:
+        The number of worker processes that score candidate moves.  If it
+        is 0 or 1, they are scored in this process.  Either way, the same
+        move is chosen for the same random seed.
 
     === Representation Invariants ===
-
+    workers >= 0
     """
     # === Private Attributes ===
     # _selected_block
@@ -308,9 +395,13 @@ class SmartPlayer(Player):
     # == Representation Invariants concerning the private attributes ==
     #     _level >= 0
     #     difficulty >= 0
+    # _pool:
+    #     The pool of worker processes, created on the first parallel move.
+    workers: int
+    _pool: Optional[multiprocessing.pool.Pool]
 
     def __init__(self, renderer: Renderer, player_id: int, goal: Goal,
-                 difficulty: int) -> None:
+                 difficulty: int, workers: int = 0) -> None:
         """Initiate a SmartPlayer"""
 
         super().__init__(renderer, player_id, goal)
@@ -323,6 +414,8 @@ class SmartPlayer(Player):
             self.diff = 5
         else:
             self.diff = difficulty
+        self.workers = workers
+        self._pool = None
 
     # todo shorten with helper functions
     def make_move(self, board: Block) -> int:
@@ -332,39 +425,27 @@ class SmartPlayer(Player):
         Return 0 upon successful completion of a move, and 1 upon a QUIT event.
         """
 
+        self.last_move = None
         scores = {}
         iterations = {0: 5, 1: 10, 2: 25, 3: 50, 4: 100, 5: 150}
         moves = iterations[self.diff]
 
-        # Get all the available blocks
-        list_ = board.get_all_blocks()
-
-        # Try all the moves, record, and undo them.
-        for _ in range(moves):
-            block = random.randint(0, len(list_) - 1)
-            curr = list_[block]
-
-            move_index = random.randint(1, 4)
-
-            if move_index == 1:
-                curr.rotate(1)
-                dict_helper(scores, self.goal.score(board), curr, 1)
-                curr.rotate(3)
-
-            elif move_index == 2:
-                curr.rotate(3)
-                dict_helper(scores, self.goal.score(board), curr, 2)
-                curr.rotate(1)
-
-            elif move_index == 3:
-                curr.swap(0)
-                dict_helper(scores, self.goal.score(board), curr, 3)
-                curr.swap(0)
+        # Try distinct moves that each change the board, record, and undo
+        # them.
+        candidates = legal_moves(board, self.metrics)
+        trials = random.sample(candidates, min(moves, len(candidates)))
+        if self.metrics is not None:
+            self.metrics.count('nodes_visited', len(trials))
+        for (curr, move_index), score in zip(trials,
+                                             self._score_trials(board,
+                                                                trials)):
+            dict_helper(scores, score, curr, move_index)
+
+        # If no move changes the board, pass.
+        if len(scores) == 0:
+            self._draw(board)
+            return 0
 
-            elif move_index == 4:
-                curr.swap(1)
-                dict_helper(scores, self.goal.score(board), curr, 4)
-                curr.swap(1)
         # Find the move with the highest score and execute that move.
         # find the max score
         score = max(scores, key=int)
@@ -373,24 +454,372 @@ class SmartPlayer(Player):
         self._selected_block.highlighted = True
 
         # draw the board, call time delay
-        self.renderer.draw(board, self.id)
-        pygame.time.wait(TIME_DELAY)
+        self._draw(board)
+        self._pause()
 
         # do the move
-        if move == 1:
-            self._selected_block.rotate(1)
-        elif move == 2:
-            self._selected_block.rotate(3)
-        elif move == 3:
-            self._selected_block.swap(0)
-        elif move == 4:
-            self._selected_block.swap(1)
+        self._apply(self._selected_block, move)
+        self.last_move = (self._selected_block, move)
 
         self._selected_block.highlighted = False
-        self.renderer.draw(board, self.id)
+        self._draw(board)
 
         return 0
 
+    def _score_trials(self, board: Block,
+                      trials: List[Tuple[Block, int]]) -> List[int]:
+        """Return this player's score after each of the (block, move) pairs
+        in <trials>, each tried alone on <board>, in the same order.
+
+        With more than one worker, <board> is copied into shared memory once
+        and the trials are split between the workers, which each decode
+        the board once and then try their share of the moves.  All of the
+        workers' time, including the moves they make, is then recorded as
+        scoring in metrics.
+        """
+        if self.workers <= 1 or len(trials) < 2:
+            results = []
+            for curr, move in trials:
+                self._apply(curr, move)
+                results.append(self._score(board))
+                self._apply(curr, UNDO[move])
+            return results
+
+        start = time.perf_counter()
+        index = {id(block): i
+                 for i, block in enumerate(board.get_all_blocks())}
+        moves = [(index[id(block)], move) for block, move in trials]
+        data = encode(board)
+        memory = shared_memory.SharedMemory(create=True, size=len(data))
+        try:
+            memory.buf[:len(data)] = data
+            # Start the workers only once shared memory is in use, so that
+            # they share this process's resource tracker.
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self.workers)
+            chunk = -(-len(moves) // self.workers)
+            tasks = [(memory.name, len(data), self.goal, moves[i:i + chunk])
+                     for i in range(0, len(moves), chunk)]
+            results = []
+            for part in self._pool.map(_score_moves, tasks):
+                results.extend(part)
+        finally:
+            memory.close()
+            memory.unlink()
+        if self.metrics is not None:
+            self.metrics.add('scoring', time.perf_counter() - start)
+            self.metrics.count('score_calls', len(trials))
+        return results
+
+    def close(self) -> None:
+        """Shut down this player's worker processes, if it has any.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+
+class SearchPlayer(Player):
+    """A player that searches several moves ahead.
+
+    A SearchPlayer cannot smash.  It looks <depth> plies ahead, where each
+    ply is one player's move, taking turns in game order.  A position is
+    worth this player's score minus the best of its opponents' scores, and
+    opponents are assumed to play to make that as small as possible, so
+    alpha-beta pruning applies.  Positions already searched during a move
+    are looked up in a bounded transposition table instead of being
+    searched again.  The table is emptied before each move, so that how a
+    move is chosen depends only on the board, the random module and this
+    player's settings, and a game resumed from a checkpoint plays on as it
+    would have.
+
+    === Public Attributes ===
+    depth:
+        The number of plies searched ahead.
+    breadth:
+        The largest number of moves tried from any one position.
+    node_budget:
+        The largest number of positions visited per move.  Once it is
+        spent, positions are scored as they stand.
+    table_size:
+        The most entries the transposition table may hold.
+    opponents:
+        The goals of the other players, in the order they move after this
+        player.
+    nodes_searched:
+        The number of positions visited during the last move.
+    nodes_per_second:
+        The rate at which positions were visited during the last move.
+
+    === Representation Invariants ===
+    depth >= 1
+    breadth >= 1
+    node_budget >= 1
+    table_size >= 1
+    """
+    # === Private Attributes ===
+    # _selected_block:
+    #     The Block that the player has most recently selected for action.
+    # _table:
+    #     The transposition table, mapping the key() of a board, the plies
+    #     left and the index of the player to move to a (value, bound) pair,
+    #     where bound is EXACT, LOWER or UPPER.  Only searches the node
+    #     budget did not cut short are kept.  The least recently used
+    #     entry is evicted when it grows past table_size entries.
+    depth: int
+    breadth: int
+    node_budget: int
+    table_size: int
+    opponents: List[Goal]
+    nodes_searched: int
+    nodes_per_second: float
+    _selected_block: Optional[Block]
+    _table: 'OrderedDict[Tuple[int, int, int], Tuple[int, int]]'
+
+    def __init__(self, renderer: Renderer, player_id: int, goal: Goal,
+                 depth: int = 2, breadth: int = 20, node_budget: int = 2000,
+                 table_size: int = 100000) -> None:
+        """Initialize this SearchPlayer.
+
+        It has no opponents until they are assigned.
+        """
+        super().__init__(renderer, player_id, goal)
+        self.depth = depth
+        self.breadth = breadth
+        self.node_budget = node_budget
+        self.table_size = table_size
+        self.opponents = []
+        self.nodes_searched = 0
+        self.nodes_per_second = 0.0
+        self._selected_block = None
+        self._table = OrderedDict()
+
+    def make_move(self, board: Block) -> int:
+        """Choose a move to make on the given board, and apply it, mutating
+        the Board as appropriate.
+
+        Return 0 upon successful completion of a move, and 1 upon a QUIT event.
+        """
+        self.last_move = None
+        start = time.perf_counter()
+        self.nodes_searched = 0
+        self._table.clear()
+        best_value = None
+        best_move = None
+        alpha = -math.inf
+        for block, move in self._candidates(board):
+            self._apply(block, move)
+            value = self._search(board, self.depth - 1, 1, alpha, math.inf)
+            self._apply(block, UNDO[move])
+            if best_value is None or value > best_value:
+                best_value = value
+                best_move = (block, move)
+            alpha = max(alpha, value)
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            self.nodes_per_second = self.nodes_searched / elapsed
+        if self.metrics is not None:
+            self.metrics.count('nodes_visited', self.nodes_searched)
+
+        # If no move changes the board, pass.
+        if best_move is None:
+            self._draw(board)
+            return 0
+
+        self._selected_block, move = best_move
+        self._selected_block.highlighted = True
+        self._draw(board)
+        self._pause()
+
+        self._apply(self._selected_block, move)
+        self.last_move = (self._selected_block, move)
+        self._selected_block.highlighted = False
+        self._draw(board)
+        return 0
+
+    def _candidates(self, board: Block) -> List[Tuple[Block, int]]:
+        """Return at most breadth of the moves that change <board>, chosen at
+        random.
+        """
+        moves = legal_moves(board, self.metrics)
+        return random.sample(moves, min(self.breadth, len(moves)))
+
+    def _evaluate(self, board: Block) -> int:
+        """Return the value of <board> to this player as it stands.
+        """
+        if self.metrics is None:
+            scores = score_goals([self.goal] + self.opponents, board)
+        else:
+            start = time.perf_counter()
+            scores = score_goals([self.goal] + self.opponents, board)
+            self.metrics.add('scoring', time.perf_counter() - start)
+            self.metrics.count('score_calls', len(scores))
+        return scores[0] - max(scores[1:], default=0)
+
+    def _search(self, board: Block, depth: int, turn: int, alpha: float,
+                beta: float) -> float:
+        """Return the value of <board> to this player, searching <depth>
+        plies ahead with the player at index <turn> of this player followed
+        by its opponents to move.
+
+        Only values strictly between <alpha> and <beta> are exact; a value
+        at or below <alpha> is an upper bound and one at or above <beta> is
+        a lower bound.
+        """
+        self.nodes_searched += 1
+        turn %= len(self.opponents) + 1
+        if depth == 0 or self.nodes_searched >= self.node_budget:
+            return self._evaluate(board)
+
+        key = (board.key(), depth, turn)
+        entry = self._table.get(key)
+        if entry is not None:
+            self._table.move_to_end(key)
+            value, bound = entry
+            if bound == EXACT:
+                return value
+            elif bound == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        moves = self._candidates(board)
+        if len(moves) == 0:
+            return self._evaluate(board)
+        low, high = alpha, beta
+        if turn == 0:
+            best = -math.inf
+            for block, move in moves:
+                self._apply(block, move)
+                best = max(best, self._search(board, depth - 1, turn + 1,
+                                              alpha, beta))
+                self._apply(block, UNDO[move])
+                alpha = max(alpha, best)
+                if alpha >= beta:
+                    break
+        else:
+            best = math.inf
+            for block, move in moves:
+                self._apply(block, move)
+                best = min(best, self._search(board, depth - 1, turn + 1,
+                                              alpha, beta))
+                self._apply(block, UNDO[move])
+                beta = min(beta, best)
+                if alpha >= beta:
+                    break
+
+        # If the budget ran out below this position, some of the positions
+        # after it were only scored as they stand, so its value is not worth
+        # keeping.
+        if self.nodes_searched >= self.node_budget:
+            return best
+        if best <= low:
+            self._table[key] = (best, UPPER)
+        elif best >= high:
+            self._table[key] = (best, LOWER)
+        else:
+            self._table[key] = (best, EXACT)
+        if len(self._table) > self.table_size:
+            self._table.popitem(last=False)
+        return best
+
+
+# The board last decoded by _score_moves in this worker process, keyed by
+# the name of the shared memory it was read from.
+_WORKER_BOARDS = {}
+
+
+def _score_moves(task: Tuple[str, int, Goal, List[Tuple[int, int]]]) \
+        -> List[int]:
+    """A helper for SmartPlayer._score_trials, run in a worker process.
+
+    <task> holds the name and length of the shared memory holding an
+    encoded board, the goal to score, and a list of (block, move) pairs,
+    where each block is given by its index in get_all_blocks.  Return the
+    goal's score after each move, each tried alone.
+    """
+    name, length, goal, moves = task
+    if name not in _WORKER_BOARDS:
+        memory = shared_memory.SharedMemory(name=name)
+        view = memory.buf[:length]
+        board = decode(view)
+        view.release()
+        memory.close()
+        _WORKER_BOARDS.clear()
+        _WORKER_BOARDS[name] = (board, board.get_all_blocks())
+    board, blocks = _WORKER_BOARDS[name]
+
+    results = []
+    for i, move in moves:
+        apply_move(blocks[i], move)
+        results.append(goal.score(board))
+        apply_move(blocks[i], UNDO[move])
+    return results
+
+
+# The move that undoes each of the moves numbered by apply_move, apart
+# from smashing, which cannot be undone.
+UNDO = {1: 2, 2: 1, 3: 3, 4: 4}
+
+# The number of the smash move in apply_move.
+SMASH = 5
+
+
+def apply_move(block: Block, move: int) -> None:
+    """A helper for make_move.
+
+    Apply the move numbered <move> to <block>: 1 rotates clockwise,
+    2 rotates counterclockwise, 3 swaps horizontally, 4 swaps vertically and
+    5 (SMASH) smashes.
+    """
+    if move == 1:
+        block.rotate(1)
+    elif move == 2:
+        block.rotate(3)
+    elif move == 3:
+        block.swap(0)
+    elif move == 4:
+        block.swap(1)
+    elif move == SMASH:
+        block.smash()
+
+
+def legal_moves(board: Block, metrics: Optional[Metrics] = None) \
+        -> List[Tuple[Block, int]]:
+    """Return the (block, move) pairs, with moves numbered as in apply_move,
+    that change <board>.
+
+    Undivided Blocks, and Blocks whose unit cells are all one colour, offer
+    no moves.  When two moves on the same Block would give it the same
+    colouring, only the first is kept.  The Blocks flattened to find the
+    moves are counted in <metrics>, if it is not None.
+    """
+    moves = []
+    flattened = 0
+    for block in board.get_all_blocks():
+        if len(block.children) == 0:
+            continue
+        grid = block.flatten_array()
+        flattened += 1
+        if grid.min() == grid.max():
+            continue
+        half = len(grid) // 2
+        seen = {grid.tobytes()}
+        results = [np.rot90(grid, 1), np.rot90(grid, -1),
+                   np.concatenate((grid[half:], grid[:half])),
+                   np.concatenate((grid[:, half:], grid[:, :half]), axis=1)]
+        for move, result in enumerate(results, 1):
+            key = result.tobytes()
+            if key not in seen:
+                seen.add(key)
+                moves.append((block, move))
+    if metrics is not None:
+        metrics.count('flatten_calls', flattened)
+    return moves
+
 
 def dict_helper(d, index: int, block: Block, move: int) -> None:
     """A helper for make_move.
@@ -411,7 +840,8 @@ if __name__ == '__main__':
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing',
             'block', 'goal', 'player', 'renderer',
-            'pygame'
+            'pygame', 'numpy', 'multiprocessing', 'math', 'time',
+            'collections', 'metrics'
         ],
         'max-attributes': 10,
         'generated-members': 'pygame.*'
@@ -8,35 +8,35 @@ University of Toronto
 
 === Module Description ===
 
-This file contains the Renderer class.
+This file contains the Renderer class, and the NullRenderer class for
+running games without a display.
+
+pygame is only needed to create a Renderer.  The colour constants are
+defined in colours.py and are imported from here for convenience.
 """
-from typing import List, Tuple
-import pygame
-
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-PACIFIC_POINT = (1, 128, 181)
-OLD_OLIVE = (138, 151, 71)
-REAL_RED = (199, 44, 58)
-MELON_MAMBO = (234, 62, 112)
-DAFFODIL_DELIGHT = (255, 211, 92)
-TEMPTING_TURQUOISE = (75, 196, 213)
-COLOUR_LIST = [PACIFIC_POINT, REAL_RED, OLD_OLIVE, DAFFODIL_DELIGHT]
-COLOUR_NAMES = ['Pacific Point', 'Real Red', 'Old Olive', 'Daffodil Delight']
+import os
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from colours import WHITE, BLACK, PACIFIC_POINT, OLD_OLIVE, REAL_RED, \
+    MELON_MAMBO, DAFFODIL_DELIGHT, TEMPTING_TURQUOISE, COLOUR_LIST, \
+    COLOUR_NAMES, colour_name, colour_index
+# pygame greets on import, which would get mixed into what play.py,
+# replay.py and benchmark.py print.  Everything that uses pygame imports
+# this module first.
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+try:
+    import pygame
+except ImportError:
+    pygame = None
 
 BOARD_WIDTH = 750
 BOARD_HEIGHT = 750
 TEXT_HEIGHT = 75
 
-
-def colour_name(colour: Tuple[int, int, int]) -> str:
-    """Return the colour name associated with this colour value, or
-    the empty string if this colour value isn't in our colour list.
-    """
-    for i in range(len(COLOUR_LIST)):
-        if COLOUR_LIST[i] == colour:
-            return COLOUR_NAMES[i]
-    return ''
+# Blocks at least this many pixels wide are drawn from cached surfaces.
+CACHE_THRESHOLD = 64
+# The most pixels that cached surfaces may hold altogether.
+CACHE_PIXELS = 8 * BOARD_WIDTH * BOARD_HEIGHT
 
 
 class Renderer:
@@ -51,19 +51,55 @@ class Renderer:
          The height and width of the rendering window, in pixels.
     player_labels:
          list of player icons to display
+    cache_threshold:
+         The smallest size, in pixels, of a subdivided Block whose picture
+         is cached in an off-screen surface.
     """
-    displayed_image: pygame.Surface
-    screen: pygame.Surface
+    # === Private Attributes ===
+    # _frame:
+    #     A record of the board as last drawn by draw, or None if the next
+    #     call to draw must repaint the whole window.  Each record is the
+    #     key() of a Block and a tuple of the records of its children.
+    # _geometry:
+    #     The position of the board last drawn by draw, and the sizes of its
+    #     Blocks at each level below it.
+    # _highlights:
+    #     The squares of the highlighted Blocks as last drawn by draw.
+    # _player:
+    #     The id of the player whose label was last drawn.
+    # _surfaces:
+    #     The cached pictures of subdivided Blocks, without highlights, by
+    #     the Block's key(), size and widened size.  White is transparent.
+    #     The least recently used surface is evicted when they hold more
+    #     than CACHE_PIXELS pixels.
+    # _cached_pixels:
+    #     The number of pixels held by _surfaces.
+    displayed_image: 'pygame.Surface'
+    screen: 'pygame.Surface'
     window_size: Tuple[int, int]
-    player_labels: List[pygame.Surface]
+    player_labels: List['pygame.Surface']
+    cache_threshold: int
+    _frame: Optional[Tuple]
+    _geometry: Tuple[Tuple[int, int], List[int]]
+    _highlights: List['pygame.Rect']
+    _player: int
+    _surfaces: 'OrderedDict[Tuple[int, int, int], pygame.Surface]'
+    _cached_pixels: int
 
-    def __init__(self, num_players: int) -> None:
+    def __init__(self, num_players: int,
+                 cache_threshold: int = CACHE_THRESHOLD) -> None:
         """Initialize this renderer.
 
         <num_players> is the total number of players in this Game.  It is
         used to render a label showing the player whose move it is at any
-        given time.
+        given time.  Subdivided Blocks at least <cache_threshold> pixels wide
+        are drawn from cached surfaces.
+
+        Raise a RuntimeError if pygame is not installed.
         """
+        if pygame is None:
+            raise RuntimeError('pygame is needed to display a game; '
+                               'use a NullRenderer to play without one')
         pygame.init()
         self.displayed_image = \
             pygame.display.set_mode((BOARD_WIDTH, BOARD_HEIGHT + 75))
@@ -80,6 +116,13 @@ class Renderer:
 
         self.displayed_image.blit(self.player_labels[0], (0, BOARD_HEIGHT))
         self._render_text_help()
+        self._frame = None
+        self._geometry = ((0, 0), [])
+        self._highlights = []
+        self._player = 0
+        self.cache_threshold = cache_threshold
+        self._surfaces = OrderedDict()
+        self._cached_pixels = 0
 
     def _render_text_help(self):
         """Add the UI text onto the display."""
@@ -100,29 +143,184 @@ class Renderer:
         )
 
     def draw(self, board: 'Block', player_id: int) -> None:
-        """Clear the canvas and draw the blocks."""
-        # draw the background map onto the screen
-        self.screen.fill(WHITE)
+        """Draw the blocks, and the label of the player with <player_id>.
 
-        selected = []
-        for colour, pos, size, width in board.rectangles_to_draw():
-            if colour == TEMPTING_TURQUOISE:
-                selected.append((colour, pos, size, width))
-            else:
-                pygame.draw.rect(self.screen, colour, (pos, size), width)
+        Only the parts of the screen that changed since the last call are
+        repainted: the squares of Blocks that were rotated, swapped or
+        smashed, and of Blocks that were highlighted or unhighlighted.
+        Large Blocks are drawn from cached surfaces, which are keyed on the
+        Block's key() and so are never out of date.  Highlights are drawn
+        on top of them.
+        """
+        position = board.position
+        sizes = [board.size]
+        for _ in range(board.level, board.max_depth):
+            sizes.append(round(sizes[-1] / 2.0))
+        # A Block's children can reach a pixel past its square when its size
+        # is odd, so each square is widened to cover all of its descendants.
+        extents = list(sizes)
+        for depth in range(len(sizes) - 2, -1, -1):
+            extents[depth] = max(sizes[depth],
+                                 sizes[depth + 1] + extents[depth + 1])
 
-        # Draw highlighted rectangle borders last
-        for colour, x, y, width in selected:
-            pygame.draw.rect(self.screen, colour, (x, y), width)
+        highlights = []
+        self._find_highlights(board, position, 0, sizes, extents, highlights)
+        full = self._frame is None or self._geometry != (position, sizes)
+        if full:
+            damage = [self.screen.get_rect()]
+            self._frame = _record(board)
+        else:
+            damage = []
+            self._frame = self._diff(board, self._frame, position, 0, sizes,
+                                     extents, damage)
+            for rect in highlights:
+                if rect not in self._highlights:
+                    damage.append(rect)
+            for rect in self._highlights:
+                if rect not in highlights:
+                    damage.append(rect)
+        self._geometry = (position, sizes)
+        self._highlights = highlights
 
-        self.displayed_image.blit(
-            self.player_labels[player_id], (0, BOARD_HEIGHT))
-        pygame.display.update()
+        for rect in damage:
+            self.screen.set_clip(rect)
+            self.screen.fill(WHITE)
+            self._paint(self.screen, board, position, 0, sizes, extents,
+                        rect)
+            # Draw highlighted rectangle borders last
+            for square in highlights:
+                if square.colliderect(rect):
+                    pygame.draw.rect(self.screen, TEMPTING_TURQUOISE, square,
+                                     5)
+        self.screen.set_clip(None)
+
+        if full or player_id != self._player:
+            damage.append(self.displayed_image.blit(
+                self.player_labels[player_id], (0, BOARD_HEIGHT)))
+            self._player = player_id
+        if full:
+            pygame.display.update()
+        elif len(damage) > 0:
+            pygame.display.update(damage)
 
         # Check for new events; this should avoid the OSX issue for delayed
         # updating of the pygame window.
         pygame.event.peek([])
 
+    def _diff(self, block: 'Block', old: Tuple, position: Tuple[int, int],
+              depth: int, sizes: List[int], extents: List[int],
+              damage: List['pygame.Rect']) -> Tuple:
+        """A helper for draw.
+
+        Return the record of <block>, given the record <old> of whatever was
+        last drawn in its place, and add to <damage> the squares within it
+        that have changed.  <block> is <depth> levels below the board, and
+        its top left corner is at <position>.  <sizes> and <extents> are
+        the sizes and widened squares of Blocks at each depth.
+        """
+        key = block.key()
+        if old[0] == key:
+            return old
+        if len(block.children) == 4 and len(old[1]) == 4:
+            children = []
+            for i in range(4):
+                children.append(self._diff(
+                    block.children[i], old[1][i],
+                    _child_position(position, i, sizes[depth + 1]),
+                    depth + 1, sizes, extents, damage))
+            return key, tuple(children)
+        damage.append(pygame.Rect(position, (extents[depth], extents[depth])))
+        return _record(block)
+
+    def _find_highlights(self, block: 'Block', position: Tuple[int, int],
+                         depth: int, sizes: List[int], extents: List[int],
+                         highlights: List['pygame.Rect']) -> None:
+        """A helper for draw.
+
+        Add the squares of the highlighted Blocks within <block> to
+        <highlights>.  The other parameters are as in _diff.
+        """
+        if block.highlighted:
+            highlights.append(pygame.Rect(position,
+                                          (sizes[depth], sizes[depth])))
+        for i in range(len(block.children)):
+            self._find_highlights(
+                block.children[i],
+                _child_position(position, i, sizes[depth + 1]), depth + 1,
+                sizes, extents, highlights)
+
+    def _paint(self, target: 'pygame.Surface', block: 'Block',
+               position: Tuple[int, int], depth: int, sizes: List[int],
+               extents: List[int], area: Optional['pygame.Rect']) -> None:
+        """A helper for draw.
+
+        Draw the rectangles of <block> that touch <area>, or all of them if
+        <area> is None, onto <target> as described in
+        Block.rectangles_to_draw, but without highlights.  The other
+        parameters are as in _diff.
+        """
+        bounds = pygame.Rect(position, (extents[depth], extents[depth]))
+        if area is not None and not area.colliderect(bounds):
+            return
+        size = (sizes[depth], sizes[depth])
+        if len(block.children) == 0:
+            pygame.draw.rect(target, block.colour, (position, size), 0)
+            pygame.draw.rect(target, BLACK, (position, size), 3)
+        elif sizes[depth] >= self.cache_threshold and \
+                (area is None or area.contains(bounds) or
+                 (block.key(), sizes[depth], extents[depth]) in
+                 self._surfaces):
+            # Drawing a new surface only pays if all of it will be shown.
+            target.blit(self._surface(block, depth, sizes, extents), position)
+        else:
+            for i in range(4):
+                self._paint(target, block.children[i],
+                            _child_position(position, i, sizes[depth + 1]),
+                            depth + 1, sizes, extents, area)
+
+    def _paint_children(self, target: 'pygame.Surface', block: 'Block',
+                        position: Tuple[int, int], depth: int,
+                        sizes: List[int], extents: List[int]) -> None:
+        """A helper for draw.
+
+        Draw the children of <block> onto <target>.  The parameters are as
+        in _paint.
+        """
+        for i in range(4):
+            self._paint(target, block.children[i],
+                        _child_position(position, i, sizes[depth + 1]),
+                        depth + 1, sizes, extents, None)
+
+    def _surface(self, block: 'Block', depth: int, sizes: List[int],
+                 extents: List[int]) -> 'pygame.Surface':
+        """A helper for draw.
+
+        Return the cached picture of the subdivided <block>, drawing it
+        first if need be.  The parameters are as in _paint.
+        """
+        key = (block.key(), sizes[depth], extents[depth])
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        surface = pygame.Surface((extents[depth], extents[depth]))
+        surface.fill(WHITE)
+        self._paint_children(surface, block, (0, 0), depth, sizes, extents)
+        surface.set_colorkey(WHITE)
+        self._surfaces[key] = surface
+        self._cached_pixels += extents[depth] * extents[depth]
+        while self._cached_pixels > CACHE_PIXELS:
+            _, old = self._surfaces.popitem(last=False)
+            self._cached_pixels -= old.get_width() * old.get_height()
+        return surface
+
+    def wait(self, milliseconds: int) -> None:
+        """Pause for <milliseconds>, so that a move can be seen before the
+        next one is drawn.
+        """
+        pygame.time.wait(milliseconds)
+
     # For game start
     def display_goal(self, player: 'Player') -> None:
         """Display the goal for the given player.
@@ -137,6 +335,7 @@ class Renderer:
         Modified from
         http://archives.seul.org/pygame/users/May-2005/msg00008.html.
         """
+        self._frame = None
         screen = self.screen
         screen.fill(colour)
         font = pygame.font.Font(None, 18)
@@ -155,19 +354,71 @@ class Renderer:
 
         pygame.display.flip()
 
-        # Wait for user click
-        while True:
-            events = pygame.event.get()
-            for e in events:
-                if e.type == pygame.MOUSEBUTTONDOWN:
-                    return
+        # Wait for user click, sleeping until each event arrives
+        while pygame.event.wait().type != pygame.MOUSEBUTTONDOWN:
+            pass
+
+
+def _child_position(position: Tuple[int, int], index: int,
+                    half: int) -> Tuple[int, int]:
+    """Return the top left corner of child <index> of a Block whose top left
+    corner is at <position>, if its children have size <half>.
+
+    >>> _child_position((10, 20), 0, 5)
+    (15, 20)
+    >>> _child_position((10, 20), 2, 5)
+    (10, 25)
+    """
+    x, y = position
+    if index == 0:
+        return x + half, y
+    elif index == 1:
+        return x, y
+    elif index == 2:
+        return x, y + half
+    return x + half, y + half
+
+
+def _record(block: 'Block') -> Tuple:
+    """Return a record of <block> and its descendants for Renderer.draw.
+    """
+    return block.key(), tuple(_record(child) for child in block.children)
+
+
+class NullRenderer(Renderer):
+    """A Renderer that draws nothing and never waits.
+
+    It stands in for a Renderer when games are played without a display,
+    such as when computer players are compared over many games.  Human
+    players cannot be used with it.
+    """
+
+    def __init__(self, num_players: int) -> None:
+        """Initialize this renderer for a game with <num_players> players.
+
+        pygame is not used, so it need not be installed.
+        """
+        self.displayed_image = None
+        self.screen = None
+        self.window_size = (BOARD_WIDTH, BOARD_HEIGHT)
+        self.player_labels = [None] * num_players
+
+    def draw(self, board: 'Block', player_id: int) -> None:
+        """Do nothing."""
+
+    def wait(self, milliseconds: int) -> None:
+        """Do nothing; there is nobody to watch."""
+
+    def display_goal(self, player: 'Player') -> None:
+        """Do nothing."""
+
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'allowed-import-modules': [
-            'doctest', 'python_ta', 'random', 'typing',
-            'block', 'goal', 'player', 'renderer',
+            'doctest', 'python_ta', 'random', 'typing', 'os', 'collections',
+            'block', 'goal', 'player', 'renderer', 'colours',
             'pygame'
         ],
         'generated-members': 'pygame.*'
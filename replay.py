@@ -0,0 +1,193 @@
+"""Assignment 2 - Blocky
+
+=== CSC148 Fall 2017 ===
+Diane Horton and David Liu
+Department of Computer Science,
+University of Toronto
+
+
+=== Module Description ===
+
+This file records the moves of a game and replays them.
+
+Each move is recorded as the index of the player who made it, the path to
+the Block it changed (see block.block_path), and the move, numbered as in
+player.apply_move.  A smash also records the Block it made, encoded by
+block.encode, rather than the state of the random module: that is a few
+bytes instead of a few kilobytes, and a replay never has to repeat the
+random choices of the players and of every other smash to get it right.
+
+A Replay re-applies recorded moves to a board of Blocks without a display
+and without any of the players' searching, so it runs as fast as the moves
+can be made.  It keeps an encoded copy of the board every few moves, so
+that seeking back to an earlier turn replays only the moves since the last
+copy before it.  For example,
+
+    python replay.py results.jsonl --seed 17 --turn 12
+
+prints the board of the game with seed 17, recorded by play.py --record,
+after its first 12 moves.
+"""
+import argparse
+import base64
+import json
+from typing import Dict, List, Optional, Tuple
+from block import Block, block_path, block_at, encode, decode, print_block
+from player import SMASH, apply_move
+from renderer import BOARD_WIDTH
+
+# The number of moves between the copies of the board a Replay keeps.
+SNAPSHOT_INTERVAL = 50
+
+# A recorded move: the player's index, the path to the Block, the move, and
+# for a smash, the encoding of what the Block became.  A turn on which the
+# player made no move is recorded with path and move 0.
+Move = Tuple[int, int, int, Optional[bytes]]
+
+
+def record_move(player: int, last_move: Optional[Tuple[Block, int]]) -> Move:
+    """Return the record of the move <last_move>, as given by
+    Player.last_move, made by the player with index <player>.
+    """
+    if last_move is None:
+        return player, 0, 0, None
+    block, move = last_move
+    if move == SMASH:
+        return player, block_path(block), move, encode(block)
+    return player, block_path(block), move, None
+
+
+def moves_to_json(moves: List[Move]) -> List[list]:
+    """Return <moves> as lists that can be written as JSON, with each
+    smashed Block's encoding in base64.
+    """
+    return [[player, path, move] if data is None else
+            [player, path, move, base64.b64encode(data).decode('ascii')]
+            for player, path, move, data in moves]
+
+
+def moves_from_json(records: List[list]) -> List[Move]:
+    """Return the moves written as JSON by moves_to_json.
+    """
+    return [(record[0], record[1], record[2],
+             base64.b64decode(record[3]) if len(record) > 3 else None)
+            for record in records]
+
+
+class Replay:
+    """A recorded game, replayed without a display.
+
+    === Public Attributes ===
+    board:
+        The board as it is after the first <turn> moves, laid out as in a
+        game.
+    turn:
+        The number of moves replayed so far.
+    moves:
+        The recorded moves of the game, in the order they were made.
+
+    === Representation Invariants ===
+    - 0 <= turn <= len(moves)
+    """
+    board: Block
+    turn: int
+    moves: List[Move]
+    # === Private Attributes ===
+    # _snapshots:
+    #     The encoded board after each multiple of _interval moves that has
+    #     been replayed, by the number of moves.
+    # _interval:
+    #     The number of moves between the entries of _snapshots.
+    _snapshots: Dict[int, bytes]
+    _interval: int
+
+    def __init__(self, board: bytes, moves: List[Move],
+                 interval: int = SNAPSHOT_INTERVAL) -> None:
+        """Initialize this Replay at the start of the game whose board
+        started out with the encoding <board> and whose moves were <moves>.
+        Keep a copy of the board every <interval> moves.
+        """
+        self.moves = moves
+        self._interval = interval
+        self._snapshots = {0: board}
+        self.turn = 0
+        self.board = _load(board)
+
+    def step(self) -> None:
+        """Replay the next move.
+
+        Precondition: turn < len(moves)
+        """
+        _, path, move, data = self.moves[self.turn]
+        if move == SMASH:
+            block_at(self.board, path).graft(decode(data))
+        elif move != 0:
+            apply_move(block_at(self.board, path), move)
+        self.turn += 1
+        if self.turn % self._interval == 0 and \
+                self.turn not in self._snapshots:
+            self._snapshots[self.turn] = encode(self.board)
+
+    def seek(self, turn: int) -> None:
+        """Bring the board to how it was after the first <turn> moves.
+
+        Precondition: 0 <= turn <= len(moves)
+        """
+        start = max(known for known in self._snapshots if known <= turn)
+        if turn < self.turn or start > self.turn:
+            self.board = _load(self._snapshots[start])
+            self.turn = start
+        while self.turn < turn:
+            self.step()
+
+    def finish(self) -> Block:
+        """Replay every move that is left, and return the final board.
+        """
+        self.seek(len(self.moves))
+        return self.board
+
+
+def _load(data: bytes) -> Block:
+    """A helper for Replay.
+
+    Return the outermost Block whose encoding is <data>, laid out as in a
+    game.
+    """
+    board = decode(data)
+    board.update_block_locations((0, 0), BOARD_WIDTH)
+    return board
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Print the board of one recorded game after some of its moves, as
+    described by the command line <args>, or by sys.argv if <args> is None.
+    """
+    parser = argparse.ArgumentParser(
+        description='Replay a game recorded by play.py --record.')
+    parser.add_argument('results', help='JSON Lines file written by play.py')
+    parser.add_argument('--seed', type=int, required=True,
+                        help='seed of the game to replay')
+    parser.add_argument('--turn', type=int, default=None,
+                        help='number of moves to replay (default: all)')
+    options = parser.parse_args(args)
+
+    with open(options.results) as file:
+        for line in file:
+            result = json.loads(line)
+            if result['seed'] == options.seed:
+                break
+        else:
+            parser.error(f'no game with seed {options.seed}')
+    if 'moves' not in result:
+        parser.error('the game was not recorded; use play.py --record')
+    replay = Replay(base64.b64decode(result['board']),
+                    moves_from_json(result['moves']))
+    replay.seek(len(replay.moves) if options.turn is None
+                else min(options.turn, len(replay.moves)))
+    print(f'Seed {options.seed} after {replay.turn} of '
+          f'{len(replay.moves)} moves:')
+    print_block(replay.board, False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""Assignment 2 - Blocky
+
+=== CSC148 Fall 2017 ===
+Diane Horton and David Liu
+Department of Computer Science,
+University of Toronto
+
+
+=== Module Description ===
+
+This file contains the BlobSummary class, which describes the blobs within
+a Block well enough to find the blobs of the Block that contains it.
+"""
+from typing import Dict, List, Tuple
+from colours import COLOUR_LIST
+
+# Indices of the edges in BlobSummary.edges.
+TOP = 0
+RIGHT = 1
+BOTTOM = 2
+LEFT = 3
+
+
+class BlobSummary:
+    """The blobs within a Block, as seen from outside of it.
+
+    Blobs that touch the edge of the Block may still grow into its
+    neighbours, so they are kept along with the unit cells they cover on
+    each edge.  Blobs that do not touch the edge can never grow, so only
+    the largest of each colour is kept.
+
+    === Public Attributes ===
+    side:
+        The number of unit cells along each side of the Block.
+    closed:
+        For each colour index, the size of the largest blob of that colour
+        that does not touch the edge of the Block, or 0 if there is none.
+    sizes:
+        The size of each blob that touches the edge of the Block, by label.
+    colours:
+        The colour index of each blob that touches the edge, by label.
+    edges:
+        The unit cells along the top, right, bottom and left edges of the
+        Block, in that order.  Each edge is a list of (label, length) runs;
+        the top and bottom edges run from left to right and the left and
+        right edges run from top to bottom.
+
+    === Representation Invariants ===
+    - len(sizes) == len(colours)
+    - the lengths of the runs on each edge add up to side
+    """
+    side: int
+    closed: List[int]
+    sizes: List[int]
+    colours: List[int]
+    edges: List[List[Tuple[int, int]]]
+
+    def __init__(self, side: int, closed: List[int], sizes: List[int],
+                 colours: List[int],
+                 edges: List[List[Tuple[int, int]]]) -> None:
+        """Initialize this BlobSummary with the given attributes.
+        """
+        self.side = side
+        self.closed = closed
+        self.sizes = sizes
+        self.colours = colours
+        self.edges = edges
+
+    def largest(self) -> List[int]:
+        """Return the size of the largest blob of each colour in COLOUR_LIST
+        within the Block, in the same order as COLOUR_LIST.
+
+        >>> leaf_summary(2, 4).largest()
+        [0, 0, 16, 0]
+        """
+        best = list(self.closed)
+        for size, colour in zip(self.sizes, self.colours):
+            if size > best[colour]:
+                best[colour] = size
+        return best
+
+
+def leaf_summary(colour: int, side: int) -> BlobSummary:
+    """Return the summary of an undivided Block of the colour at index
+    <colour> in COLOUR_LIST, with <side> unit cells along each side.
+
+    The whole Block is one blob, however large it is.
+    """
+    run = [(0, side)]
+    return BlobSummary(side, [0] * len(COLOUR_LIST), [side * side], [colour],
+                       [run, run, run, run])
+
+
+def merge_summaries(children: List[BlobSummary]) -> BlobSummary:
+    """Return the summary of a Block whose children have the summaries in
+    <children>, listed in the order of Block.children.
+
+    Blobs are joined wherever two children share an edge, so the cost
+    depends on the number of runs along the children's edges rather than on
+    the number of unit cells.
+
+    >>> red = leaf_summary(1, 2)
+    >>> merged = merge_summaries([red, leaf_summary(0, 2), red, red])
+    >>> merged.largest()
+    [4, 12, 0, 0]
+    >>> merged.edges[TOP]
+    [(0, 2), (1, 2)]
+    """
+    upper_right, upper_left, lower_left, lower_right = children
+
+    # Give every edge blob of every child a label of its own, then union
+    # the labels of matching blobs across the four shared edges.
+    parent = []
+    sizes = []
+    colours = []
+    bases = []
+    for child in children:
+        bases.append(len(parent))
+        parent.extend(range(len(parent), len(parent) + len(child.sizes)))
+        sizes.extend(child.sizes)
+        colours.extend(child.colours)
+    _join(parent, colours, upper_left.edges[RIGHT], bases[1],
+          upper_right.edges[LEFT], bases[0])
+    _join(parent, colours, lower_left.edges[RIGHT], bases[2],
+          lower_right.edges[LEFT], bases[3])
+    _join(parent, colours, upper_left.edges[BOTTOM], bases[1],
+          lower_left.edges[TOP], bases[2])
+    _join(parent, colours, upper_right.edges[BOTTOM], bases[0],
+          lower_right.edges[TOP], bases[3])
+
+    totals = [0] * len(parent)
+    for label in range(len(parent)):
+        totals[_find(parent, label)] += sizes[label]
+
+    # The blobs still on an edge keep a (new) label; all others are closed.
+    labels = {}
+    edges = [
+        _relabel(parent, labels, [(upper_left.edges[TOP], bases[1]),
+                                  (upper_right.edges[TOP], bases[0])]),
+        _relabel(parent, labels, [(upper_right.edges[RIGHT], bases[0]),
+                                  (lower_right.edges[RIGHT], bases[3])]),
+        _relabel(parent, labels, [(lower_left.edges[BOTTOM], bases[2]),
+                                  (lower_right.edges[BOTTOM], bases[3])]),
+        _relabel(parent, labels, [(upper_left.edges[LEFT], bases[1]),
+                                  (lower_left.edges[LEFT], bases[2])])
+    ]
+    closed = [max(values) for values in zip(*[child.closed
+                                             for child in children])]
+    edge_sizes = [0] * len(labels)
+    edge_colours = [0] * len(labels)
+    for label in range(len(parent)):
+        if parent[label] == label:
+            if label in labels:
+                edge_sizes[labels[label]] = totals[label]
+                edge_colours[labels[label]] = colours[label]
+            elif totals[label] > closed[colours[label]]:
+                closed[colours[label]] = totals[label]
+
+    return BlobSummary(upper_left.side * 2, closed, edge_sizes, edge_colours,
+                       edges)
+
+
+def rotate_summary(summary: BlobSummary, turns: int) -> BlobSummary:
+    """Return the summary of a Block with summary <summary> after it is
+    rotated clockwise by <turns> quarter turns.
+
+    Only the edges move: each one becomes the next edge clockwise, reversed
+    when it lands on the top or bottom, since those run from left to right.
+
+    >>> red = leaf_summary(1, 2)
+    >>> merged = merge_summaries([red, leaf_summary(0, 2), red, red])
+    >>> rotate_summary(merged, 1).edges[TOP]
+    [(1, 2), (0, 2)]
+    >>> rotate_summary(merged, 1).edges[RIGHT]
+    [(0, 2), (1, 2)]
+    >>> rotate_summary(merged, 4).edges == merged.edges
+    True
+    """
+    edges = summary.edges
+    for _ in range(turns % 4):
+        edges = [edges[LEFT][::-1], edges[TOP], edges[RIGHT][::-1],
+                 edges[BOTTOM]]
+    return BlobSummary(summary.side, summary.closed, summary.sizes,
+                       summary.colours, edges)
+
+
+def _find(parent: List[int], label: int) -> int:
+    """A helper for merge_summaries.
+
+    Return the representative label of the set containing <label>, halving
+    the path to it along the way.
+    """
+    while parent[label] != label:
+        parent[label] = parent[parent[label]]
+        label = parent[label]
+    return label
+
+
+def _join(parent: List[int], colours: List[int],
+          first: List[Tuple[int, int]], first_base: int,
+          second: List[Tuple[int, int]], second_base: int) -> None:
+    """A helper for merge_summaries.
+
+    Union the labels of same-coloured blobs that face each other across a
+    shared edge.  <first> and <second> are the runs along the two sides of
+    the edge, whose labels are offset by <first_base> and <second_base>.
+    """
+    i = 0
+    j = 0
+    first_left = first[0][1]
+    second_left = second[0][1]
+    while i < len(first) and j < len(second):
+        a = first_base + first[i][0]
+        b = second_base + second[j][0]
+        if colours[a] == colours[b]:
+            a = _find(parent, a)
+            b = _find(parent, b)
+            if a != b:
+                parent[a] = b
+        step = min(first_left, second_left)
+        first_left -= step
+        second_left -= step
+        if first_left == 0:
+            i += 1
+            if i < len(first):
+                first_left = first[i][1]
+        if second_left == 0:
+            j += 1
+            if j < len(second):
+                second_left = second[j][1]
+
+
+def _relabel(parent: List[int], labels: Dict[int, int],
+             pieces: List[Tuple[List[Tuple[int, int]], int]]) \
+        -> List[Tuple[int, int]]:
+    """A helper for merge_summaries.
+
+    Return the runs of <pieces>, each a list of runs and the offset of its
+    labels, joined end to end and relabelled with the labels of the merged
+    blobs.  <labels> maps representative labels to new labels, and is
+    extended as new blobs are reached.
+    """
+    runs = []
+    for piece, base in pieces:
+        for label, length in piece:
+            root = _find(parent, base + label)
+            if root not in labels:
+                labels[root] = len(labels)
+            label = labels[root]
+            if runs and runs[-1][0] == label:
+                runs[-1] = (label, runs[-1][1] + length)
+            else:
+                runs.append((label, length))
+    return runs
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', 'colours'
+        ],
+        'max-attributes': 15
+    })